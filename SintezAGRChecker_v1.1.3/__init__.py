@@ -27,6 +27,7 @@ from .scripts import operators
 from .scripts import logger
 from .scripts import os_utils
 from .scripts import utills
+from .scripts import texel_density
 
 
 class VIEW3D_PT_Parent:
@@ -80,9 +81,18 @@ class VIEW3D_PT_Main(VIEW3D_PT_Parent, bpy.types.Panel):
         layout.label(text="Подготовка моделей")
         layout.prop(scene_properties, "path", text="Архивы АГР")
         # layout.separator(type='LINE')
+        check_run = context.window_manager.agr_check_run
         row = layout.row()
-        row.operator(operator="agr.run_calculate_all", icon='PLAY', text="Проверить все файлы АГР (очищает blender файл)")
+        if check_run.running:
+            row.progress(text=check_run.progress_text, factor=check_run.progress, type='BAR')
+            row.operator(operator="agr.cancel_calculate_all", icon='CANCEL', text="")
+            col = layout.column(align=True)
+            for line in check_run.stage_timings.splitlines():
+                col.label(text=line)
+        else:
+            row.operator(operator="agr.run_calculate_all", icon='PLAY', text="Проверить все файлы АГР (очищает blender файл)")
         row.scale_y = 1.5
+        layout.operator(operator="agr.run_preflight", icon='FILE_ARCHIVE', text="Быстрая проверка архивов (без импорта)")
         import_row = layout.row()
         import_row.operator(operator="agr.clear_blender_file_button", icon='TRASH', text="Очистить файл")
         import_row.operator(operator="agr.import_models_button", icon='IMPORT', text="Импортировать модели")
@@ -140,6 +150,12 @@ class VIEW3D_PT_Checklist_Settings(VIEW3D_PT_Parent, bpy.types.Panel):
         layout.prop(context.scene.agr_scene_properties, "unlock_auto_checks", text="Разблокировать автопроверки", icon='AUTO')
         show_req_nums_icon = 'HIDE_OFF' if context.scene.agr_scene_properties.show_req_nums else 'HIDE_ON'
         layout.prop(context.scene.agr_scene_properties, "show_req_nums", text="Отображать номера проверок", icon=show_req_nums_icon)
+        layout.prop(context.scene.agr_scene_properties, "use_results_cache", text="Кэш результатов проверок", icon='FILE_CACHE')
+        row = layout.row()
+        # background processes always check fbx files one by one
+        row.active = context.scene.agr_scene_properties.worker_processes == 0
+        row.prop(context.scene.agr_scene_properties, "streaming_checks", text="Поочередная проверка fbx", icon='MEMORY')
+        layout.prop(context.scene.agr_scene_properties, "worker_processes", text="Фоновые процессы")
 
 class VIEW3D_PT_Checklist_Lowpoly(VIEW3D_PT_Parent, bpy.types.Panel):
     bl_parent_id = "Panel_Main"
@@ -379,6 +395,11 @@ class VIEW3D_PT_TexelDencity(VIEW3D_PT_Parent, bpy.types.Panel):
             text='Выбрать полигоны БОЛЬШЕ допуска'
         )
 
+        self.layout.operator(
+            operator='agr.select_flipped',
+            text='Выбрать зеркальные полигоны'
+        )
+
         # self.layout.operator(
         #     operator='agr.select_out_udim',
         #     text='select_udim_out'
@@ -391,9 +412,11 @@ classes = (
     properties.CUSTOM_objectCollection_category,
     properties.ChecklistProperties,
     properties.AGRCheckerProperties,
+    properties.CheckRunProperties,
     model_preparer.ImportModelsOperator,
     selection.SelectTexelLessOperator,
     selection.SelectTexelGreaterOperator,
+    selection.SelectFlippedOperator,
     selection.SelectUdimOutOperator,
     selection.TDValuesSetOperator,
     VIEW3D_PT_Main,
@@ -407,6 +430,8 @@ classes = (
     operators.ImportModelsButton,
     operators.ClearBlenderFileButton,
     operators.RunCalculate_all,
+    operators.CancelCalculate_all,
+    operators.RunPreflight,
     operators.RunCalculate_all_collections,
     operators.ClearChecklist,
     operators.CheckboxTestOperator,
@@ -426,7 +451,9 @@ classes = (
 
 @bpy.app.handlers.persistent
 def load_post_handler(dummy):
-    pass
+    texel_density.clear_cache()
+    # modal check is stopped by file loading
+    bpy.context.window_manager.agr_check_run.running = False
     # print("Event: load_post" + bpy.data.filepath)
     # logger.add("Event: load_post" + bpy.data.filepath)
     # ui_utills.update_images()
@@ -444,7 +471,9 @@ def register():
         bpy.utils.register_class(cls)
 
     bpy.types.Scene.agr_scene_properties = PointerProperty(type=properties.AGRCheckerProperties)
+    bpy.types.WindowManager.agr_check_run = PointerProperty(type=properties.CheckRunProperties)
     bpy.app.handlers.load_post.append(load_post_handler)
+    bpy.app.handlers.depsgraph_update_post.append(texel_density.depsgraph_update_handler)
 
 def unregister():
     for cls in reversed(classes):
@@ -454,7 +483,9 @@ def unregister():
             pass
 
     del bpy.types.Scene.agr_scene_properties
+    del bpy.types.WindowManager.agr_check_run
     bpy.app.handlers.load_post.remove(load_post_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(texel_density.depsgraph_update_handler)
 
 if __name__ == "__main__":
     register()
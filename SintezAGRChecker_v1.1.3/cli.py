@@ -0,0 +1,119 @@
+# blender --background --factory-startup --python cli.py -- <project folder> [<project folder> ...] [--output <folder>] [--workers <count>]
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+
+import bpy
+
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_NAME = "sintez_agr_checker"
+RESULT_FILE_NAME = "check_results.json"
+
+
+def parse_args(argv):
+    args = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="blender --background --python cli.py --",
+                                     description="Проверка АГР без интерфейса Blender. Результаты сохраняются в json для каждого проекта")
+    parser.add_argument("roots", nargs="*", help="папки проектов с zip-архивами")
+    parser.add_argument("-o", "--output", default="", help=f"папка для результатов (по умолчанию {RESULT_FILE_NAME} в AGRChecker_data проекта)")
+    parser.add_argument("--address", default="", help="адрес объекта, по умолчанию определяется по именам файлов")
+    parser.add_argument("--cache", action="store_true", help="использовать кэш результатов проверок")
+    parser.add_argument("--streaming", action="store_true", help="импортировать и проверять fbx-файлы по одному")
+    parser.add_argument("--workers", type=int, default=0, help="количество фоновых процессов Blender для параллельной проверки fbx-файлов")
+    # worker process started by scripts/worker_farm.py
+    parser.add_argument("--worker", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--kind", choices=["lp", "hp"], default="hp", help=argparse.SUPPRESS)
+    parser.add_argument("--oks-count", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--result", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args(args)
+    if not args.roots and not args.worker:
+        parser.error("не указаны папки проектов")
+    return args
+
+def load_addon():
+    '''Addon package loaded from this folder and registered (scene properties are used by logger)'''
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+    spec = importlib.util.spec_from_file_location(PACKAGE_NAME, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+def checks_to_dict(checks_by_ids):
+    if checks_by_ids is None:
+        return None
+    return {req_id: [check.to_dict() for check in checks] for req_id, checks in checks_by_ids.items()}
+
+def failed_ids(checks_by_ids):
+    if checks_by_ids is None:
+        return []
+    return sorted(req_id for req_id, checks in checks_by_ids.items() if not all(check.verified for check in checks))
+
+def get_result_path(root, output):
+    if output:
+        os.makedirs(output, exist_ok=True)
+        return os.path.join(output, os.path.basename(os.path.normpath(root)) + ".json")
+    from sintez_agr_checker.scripts import os_utils
+    data_dir = os.path.join(root, os_utils.CHECKLIST_DATA_FOLDER_NAME)
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, RESULT_FILE_NAME)
+
+def check_project(root, args):
+    '''Run all checks of one project and write results to json. Returns result data'''
+    from sintez_agr_checker.scripts import check_highpoly_lowpoly, logger, worker_farm
+
+    root = os.path.abspath(root)
+    bpy.context.scene.agr_scene_properties.path = root
+    logger.initialize(root)
+    errors_count = check_highpoly_lowpoly.handled_errors_count
+    start = time.time()
+    if args.workers > 0:
+        lp_result, hp_result, project_data = worker_farm.run(root, args.address, args.workers, args.cache)
+    else:
+        lp_result, hp_result, project_data = check_highpoly_lowpoly.run(None, args.address, root, False, args.cache, args.streaming)
+    result = {
+        "root": root,
+        "address": project_data.address,
+        "duration": round(time.time() - start, 2),
+        # checks interrupted by unexpected errors
+        "errors_count": check_highpoly_lowpoly.handled_errors_count - errors_count,
+        "failed_lowpoly": failed_ids(lp_result),
+        "failed_highpoly": failed_ids(hp_result),
+        "lowpoly": checks_to_dict(lp_result),
+        "highpoly": checks_to_dict(hp_result),
+    }
+    with open(get_result_path(root, args.output), 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    return result
+
+def main(argv):
+    args = parse_args(argv)
+    load_addon()
+    if args.worker:
+        from sintez_agr_checker.scripts import worker_farm
+        return worker_farm.run_worker(os.path.abspath(args.worker), args.kind == "lp", args.address, args.oks_count, args.result)
+    exit_code = 0
+    for root in args.roots:
+        if not os.path.isdir(root):
+            print(f"Папка проекта не найдена: {root}")
+            exit_code = 1
+            continue
+        try:
+            result = check_project(root, args)
+        except Exception as e:
+            print(f"Не удалось проверить проект {root} ({e})")
+            exit_code = 1
+            continue
+        print(f"{root}: НПМ ошибок - {len(result['failed_lowpoly'])}, ВПМ ошибок - {len(result['failed_highpoly'])}, {result['duration']} сек.")
+        if result["errors_count"]:
+            exit_code = 1
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
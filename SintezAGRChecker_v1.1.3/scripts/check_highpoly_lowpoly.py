@@ -11,25 +11,35 @@ import traceback
 
 import bpy
 import bmesh
+import numpy as np
 
-import struct
-import imghdr
 
 from itertools import groupby
 from . import utills
 from . import os_utils
 from . import logger
+from . import mesh_utils
+from . import texel_density
+from . import mesh_stats
+from . import image_utils
+from . import udim_catalog
+from . import zip_extractor
+from . import result_cache
+from . import project_index
+from . import fbx_inventory
+from . import check_progress
 
 
 def exception_handler(func):
     def wrapper(*args, **kwargs):
-        global start_time
+        global start_time, handled_errors_count
         result = []
         try:
             result = func(*args, **kwargs)
             t = round(time.time() - start_time, 2)
             logger.add(f"completed function - {func.__name__}, timestamp={t} сек.")
         except Exception as e:
+            handled_errors_count += 1
             logger.add_error(e, msg=f"Непредвиденная ошибка во время {func.__name__}!")
         return result
     return wrapper
@@ -43,6 +53,7 @@ class HighpolyChecks():
         self._oks_count = 0
         self.address = ""
         self.root_path = ""
+        self.project_index: project_index.ProjectIndex = None
         self._start_time = 0
         self.bl_operator = None
 
@@ -57,40 +68,92 @@ class HighpolyChecks():
                 self.hp_checks_by_ids[check.paragraph_ids[0]] = []
             self.hp_checks_by_ids[check.paragraph_ids[0]].append(check)
 
-    def run_meshes_check(self, fbx_files, oks_count, bl_operator):
+    def run_meshes_check(self, fbx_files, oks_count, bl_operator, loader=None):
+        '''loader - ModelPreparer of streaming mode, fbx files are imported and removed one by one'''
+        for _ in self.iter_meshes_check(fbx_files, oks_count, bl_operator, loader):
+            pass
+
+    def iter_meshes_check(self, fbx_files, oks_count, bl_operator, loader=None):
+        '''Steps of run_meshes_check, yields each checked fbx'''
         self._hp_fbx_files = fbx_files
         self._oks_count = oks_count
         self.bl_operator = bl_operator
+        self.detect_address(fbx_files)
         
-        for fbx in self._hp_fbx_files:
-            obj = fbx.main_mesh
-            if not obj:
-                continue
-            fbx.create_udim_set()
+        checked_fbx_files = [fbx for fbx in fbx_files if fbx.cached_checks is None]
+        if loader is None:
+            self._prepare_fbx_files(checked_fbx_files)
 
         hp_checks = []
         self._start_time = time.time()
-        hp_checks.extend(self._check_meshes_transforms())
-        hp_checks.extend(self._check_polycount())
-        hp_checks.extend(self._check_duplicates())
-        hp_checks.extend(self._check_texel_dencity())
-        hp_checks.extend(self._check_naming_masks())
-        hp_checks.extend(self._check_fbx_objects())
-        hp_checks.extend(self._udim_numbers_check())
-        hp_checks.extend(self._check_glasses_uv())
-        hp_checks.extend(self._check_materials())
-        hp_checks.extend(self._check_lights())
-        hp_checks.extend(self._check_collision())
-        hp_checks.extend(CheckUtils.check_files(False, self.root_path))
-        hp_checks.extend(self._check_flipped())
-        hp_checks.extend(self._check_json_properties())
-        hp_checks.extend(self._check_pivot())
-        hp_checks.extend(self._check_png())
-        hp_checks.extend(CheckUtils.check_color_attributes(self._hp_fbx_files))
+        for fbx in fbx_files:
+            if fbx.cached_checks is not None:
+                hp_checks.extend(fbx.cached_checks)
+                continue
+            if loader is None:
+                hp_checks.extend(self._run_fbx_checks(fbx))
+            elif loader.load_fbx(fbx):
+                self._prepare_fbx_files([fbx])
+                hp_checks.extend(self._run_fbx_checks(fbx))
+                loader.unload_fbx(fbx)
+            yield fbx
+        self._hp_fbx_files = fbx_files
+        hp_checks.extend(CheckUtils.check_files(False, self.project_index))
 
         self.add_checks(hp_checks)
         # self.generate_result()
 
+    def _prepare_fbx_files(self, fbx_files):
+        textured_fbx_files = []
+        for fbx in fbx_files:
+            fbx.collect_stats()
+            obj = fbx.main_mesh
+            if not obj:
+                continue
+            textured_fbx_files.append(fbx)
+        CheckUtils.validate_fbx_textures(textured_fbx_files)
+        for fbx in textured_fbx_files:
+            fbx.create_udim_set()
+
+    def _run_fbx_checks(self, fbx):
+        '''All checks of one fbx. fbx.checks is set only if checks were completed without errors'''
+        errors_count = handled_errors_count
+        self._hp_fbx_files = [fbx]
+        checks = []
+        checks.extend(self._check_meshes_transforms())
+        checks.extend(self._check_polycount())
+        checks.extend(self._check_duplicates())
+        checks.extend(self._check_texel_dencity())
+        checks.extend(self._check_naming_masks())
+        checks.extend(self._check_fbx_objects())
+        checks.extend(self._udim_numbers_check())
+        checks.extend(self._check_glasses_uv())
+        checks.extend(self._check_materials())
+        checks.extend(self._check_lights())
+        checks.extend(self._check_collision())
+        checks.extend(self._check_flipped())
+        checks.extend(self._check_json_properties())
+        checks.extend(self._check_pivot())
+        checks.extend(self._check_png())
+        checks.extend(CheckUtils.check_color_attributes(self._hp_fbx_files))
+        fbx.checks = checks if handled_errors_count == errors_count else None
+        return checks
+
+    def run_fbx_check(self, fbx, oks_count):
+        '''Checks of one imported fbx without project-level checks (worker process). Address must be detected by all fbx files'''
+        self._oks_count = oks_count
+        self._prepare_fbx_files([fbx])
+        return self._run_fbx_checks(fbx)
+
+    def detect_address(self, fbx_files):
+        if self.address:
+            return
+        for fbx in fbx_files:
+            if "ground" in fbx.name.lower() and "light" not in fbx.name.lower():
+                adress = fbx.name.replace("_Ground", "")
+                adress = adress.replace("SM_", "")
+                self.address = adress
+
     def _time_stamp(self, msg):
         # t = (datetime.datetime.now() - self._start_time)
         t = round(time.time() - self._start_time, 2)
@@ -273,15 +336,6 @@ class HighpolyChecks():
         checks = []
         # adress = self._fbx_files[0].name
         adress = self.address
-        if not adress:
-            for fbx in self._hp_fbx_files:
-                if "ground" in fbx.name.lower() and "light" not in fbx.name.lower():
-                    adress = fbx.name.replace("_Ground", "")
-                    adress = adress.replace("SM_", "")
-                    self.address = adress
-                else:
-                    pass
-                    # re.search(r"SM_(\w+)_\d\d\d|SM_(\w+)_Ground|SM_(\w+)", fbx.name)
         
         has_adress_num = False
         adress_num = ""
@@ -495,20 +549,19 @@ class HighpolyChecks():
             ucx_count = 0
             other_count = 0
             fbx_name = fbx.name.lower()
-            for obj in fbx.meshes:
-                obj_name = obj.name.lower()
+            for record in fbx.composition:
                 if "light" in fbx_name:
-                    if obj.type != 'LIGHT' and obj.type != 'EMPTY':
-                        check1.add_error(f"Лишний объект: {obj.name} ({obj.type})")
+                    if record.type != 'LIGHT' and record.type != 'EMPTY':
+                        check1.add_error(f"Лишний объект: {record.name} ({record.type})")
                 else:
-                    if obj.parent != None:
-                        check13.add_error(f"{obj.parent.name}: Объекты геометрии не должны иметь иерархических связей между собой")
-                    if obj.type != 'MESH':
-                        check1.add_error(f"Лишний объект: {obj.name} ({obj.type})")
+                    if record.parent_name != None:
+                        check13.add_error(f"{record.parent_name}: Объекты геометрии не должны иметь иерархических связей между собой")
+                    if record.type != 'MESH':
+                        check1.add_error(f"Лишний объект: {record.name} ({record.type})")
                         continue
-                    if "ucx" in obj_name:
+                    if record.role == "ucx":
                         ucx_count += 1
-                    elif "glass" in obj_name:
+                    elif record.role == "glass":
                         glass_count += 1
                     else:
                         other_count += 1
@@ -537,11 +590,8 @@ class HighpolyChecks():
     def _check_glasses_uv(self):
         checks = []
         for fbx in self._hp_fbx_files:
-            obj = None
-            for mesh in fbx.meshes:
-                if "Glass" in mesh.name:
-                    obj = mesh
-            if not obj:
+            glasses = [record for record in fbx.stats.meshes if "Glass" in record.name]
+            if not glasses:
                 continue
 
             check1 = Check("Проверка UDIM. Остекление", fbx.name, True, "таблица 2, п. 5, п/п 2.2.1", "", ["2.5.2.2.1а"])
@@ -549,30 +599,17 @@ class HighpolyChecks():
             # check2 = Check("Проверка UDIM. Остекление. Вертикальная ориентация", fbx.name, True, "таблица 2, п. 5, п/п 2.2.3", "", ["2.5.2.2.3"])
             # checks.append(check2)
 
-            bpy.ops.object.mode_set(mode='OBJECT')
-            face_count = len(obj.data.polygons)
-
-            bpy.context.view_layer.objects.active = obj
-            bpy.ops.object.mode_set(mode='EDIT')
-            bm = bmesh.from_edit_mesh(obj.data)
-            # bmesh.ops.triangulate(bm, faces=bm.faces[:])
-            bm.faces.ensure_lookup_table()
-
-            loops = []
-            try:
-                for x in range(face_count):
-                    for loop in bm.faces[x].loops:
-                        loops.append(loop[bm.loops.layers.uv.active].uv)
-                        # loops.append(loop[layer].uv)
-            except:
-                check1.add_error(f"Can`t find UVmap, obj={obj.name}")
-                continue
-
-            udim_nums = [CheckUtils.uv_to_udim_number(loops[i].x, loops[i].y) for i in range(len(loops))]
-            if any(num != 1001 for num in udim_nums):
-                check1.add_error("UV-развертка остекления вне UDIM плитки 1001")
-            
-            bpy.ops.object.mode_set(mode='OBJECT')
+            for record in glasses:
+                obj = record.obj
+                if obj.mode == 'EDIT':
+                    obj.update_from_editmode()
+                uv = mesh_utils.get_active_uv(obj.data)
+                if uv is None:
+                    check1.add_error(f"Can`t find UVmap, obj={obj.name}")
+                    continue
+                out_count = int(np.count_nonzero(texel_density.uv_to_udim_numbers(uv) != 1001))
+                if out_count > 0:
+                    check1.add_error(f"{obj.name}: UV-развертка остекления вне UDIM плитки 1001 ({out_count} шт. вершин развертки)")
 
             # bpy.ops.object.mode_set(mode='OBJECT')
             # me = obj.data
@@ -637,36 +674,35 @@ class HighpolyChecks():
 
             ucx_err = 0
             ucx_with_material_count = 0
-            for obj in fbx.meshes:
-                if obj.type != 'MESH':
-                    continue
-                uvmap_count = len(obj.data.uv_layers)
+            for record in fbx.stats.meshes:
+                uvmap_count = record.uv_layers_count
+                mat_count = record.materials_count
                 # max_count = 0 if "UCX" in obj.name else 1
-                if "UCX" in obj.name:
+                if "UCX" in record.name:
                     if uvmap_count > 0:
                         ucx_err += 1
                 else:
                     if uvmap_count > 1:
-                        check1.add_error(f"{obj.name} - Более одной UV-развертки")
+                        check1.add_error(f"{record.name} - Более одной UV-развертки")
                     elif uvmap_count == 0:
-                        check1.add_error(f"{obj.name} - Не найдено UV-развертки")
+                        check1.add_error(f"{record.name} - Не найдено UV-развертки")
                 
-                if "Glass" in obj.name:
-                    if len(obj.data.materials) > 7:
-                        check2.add_error(f"{obj.name}: Более 7 материалов остекления")
-                elif "UCX" in obj.name:
-                    if len(obj.data.materials) > 0:
+                if "Glass" in record.name:
+                    if mat_count > 7:
+                        check2.add_error(f"{record.name}: Более 7 материалов остекления")
+                elif "UCX" in record.name:
+                    if mat_count > 0:
                         ucx_with_material_count += 1
                         # check22.add_error(f"{obj.name}: У геометрии коллизий не должно быть материала")
-                elif len(obj.data.materials) > 7:
-                    check23.add_error(f"{obj.name}: Более 7 материалов")
-                elif len(obj.data.materials) == 0:
-                    check23.add_error(f"{obj.name}: отсутствует материал")
+                elif mat_count > 7:
+                    check23.add_error(f"{record.name}: Более 7 материалов")
+                elif mat_count == 0:
+                    check23.add_error(f"{record.name}: отсутствует материал")
                 # elif len(fbx.udim_set.diffuse_set) <= 100 and len(obj.data.materials) > 1:
-                elif len(obj.data.materials) > 1:
-                    check24.add_error(f"{obj.name}: Более 1 материала допустимо использовать при кол-ве текстур более 100 шт. на один fbx файл")
+                elif mat_count > 1:
+                    check24.add_error(f"{record.name}: Более 1 материала допустимо использовать при кол-ве текстур более 100 шт. на один fbx файл")
 
-                for mat in obj.data.materials:
+                for mat in record.materials:
                     bsdf = CheckUtils.get_bsdf(mat)
                     if not bsdf:
                         continue
@@ -760,10 +796,13 @@ class HighpolyChecks():
                 if num_str.isdigit():
                     ucx_nums.append(int(num_str))
                 
-                me = obj.data
-                if len(me.vertices) - len(me.edges) + len(me.polygons) != 2:
+                if len(obj.data.polygons) == 0:
+                    unclosed_nums.append(f"{num_str} (нет полигонов)")
+                    continue
+                boundary_count, non_manifold_count, loose_count = mesh_utils.get_manifold_errors(obj.data)
+                if boundary_count or non_manifold_count or loose_count:
                     # check1.add_error(f"{obj.name}: Незамкнутая геометрия")
-                    unclosed_nums.append(num_str)
+                    unclosed_nums.append(f"{num_str} (открытых ребер - {boundary_count}, неманифолдных ребер - {non_manifold_count}, несвязанных вершин - {loose_count})")
                     continue
 
                 # bpy.context.view_layer.objects.active = obj
@@ -791,22 +830,10 @@ class HighpolyChecks():
                 check1.add_error(f"Невыпуклая геометрия. {len(non_convex_nums)} шт., номера коллизий - {nums}.")
 
 
-            list2 = list(reversed(fbx.meshes))
+            ucx_objects = [obj for obj in fbx.meshes if obj.type == "MESH" and "UCX" in obj.name]
             intersections = []
-            for obj_1 in fbx.meshes:
-                if obj_1.type != "MESH" or "UCX" not in obj_1.name:
-                    continue
-                for obj_2 in list2:
-                    if obj_2.type != "MESH" or obj_2 == obj_1 or "UCX" not in obj_2.name:
-                        continue
-                    # if "Ground" in obj_1.name and "Ground" not in obj_2.name or "Ground" not in obj_1.name and "Ground" in obj_2.name:
-                    #     continue
-                    intersection = CheckUtils.check_bvh_intersection(obj_1, obj_2)
-                    if intersection:
-                        # check4.add_error(f"Пересечение коллизий {obj_1.name[-3:]} и {obj_2.name[-3:]}")
-                        intersections.append(f"({obj_1.name[-3:]} и {obj_2.name[-3:]})")
-                        # logger.add(f"{obj_1.name}{'' if intersection else ' DOES NOT'} intersect {obj_2.name}")
-                list2.pop()
+            for obj_1, obj_2 in CheckUtils.find_intersecting_pairs(ucx_objects):
+                intersections.append(f"({obj_1.name[-3:]} и {obj_2.name[-3:]})")
             if intersections:
                 if len(intersections) > 15:
                     nums = ", ".join(intersections[:15]) + ", и т. д."
@@ -827,28 +854,17 @@ class HighpolyChecks():
     @exception_handler
     def _check_flipped(self):
         checks = []
-        # for fbx in self._hp_fbx_files:
-        #     check1 = Check("Проверка UDIM. Зеркальные острова", fbx.name, True, "таблица 2, п. 5, п/п 2.1.4", "", ["2.5.2.1.4"])
-        #     checks.append(check1)
+        for fbx in self._hp_fbx_files:
+            check1 = Check("Проверка UDIM. Зеркальные острова", fbx.name, True, "таблица 2, п. 5, п/п 2.1.4", "полигонов", ["2.5.2.1.4"])
+            checks.append(check1)
 
-        #     for obj in fbx.meshes:
-        #         if obj.type != 'MESH' or not len(obj.data.uv_layers) or "ucx" in obj.name.lower():
-        #             continue
-        #         bpy.ops.object.mode_set(mode='OBJECT')
-        #         bpy.context.view_layer.objects.active = obj
-        #         bpy.ops.object.mode_set(mode='EDIT')
-        #         bm = bmesh.from_edit_mesh(obj.data)
-        #         uv_layer = bm.loops.layers.uv.verify()
-
-        #         sel_faces = [f for f in bm.faces]
-        #         flipped_count = CheckUtils.get_flipped_count(sel_faces, uv_layer)
-        #         if flipped_count > 0:
-        #             check1.add_error(f"{obj.name}: зеркальных полигонов - {flipped_count} шт.")
-
-        # try:
-        #     bpy.ops.object.mode_set(mode='OBJECT')
-        # except:
-        #     pass
+            for record in fbx.stats.meshes:
+                if not record.uv_layers_count or record.role == "ucx":
+                    continue
+                check1.checked_count += record.polycount
+                flipped_indices = CheckUtils.get_flipped_polygons(record.obj)
+                if len(flipped_indices) > 0:
+                    check1.add_error(f"{record.name}: зеркальных полигонов - {len(flipped_indices)} шт.")
         return checks
 
     @exception_handler
@@ -918,14 +934,13 @@ class HighpolyChecks():
             check1 = Check("Проверка геометрии. Точка отсчета", fbx.name, True, "таблица 2, п. 9, п/п 4", "", ["2.9.4а"])
             checks.append(check1)
 
-            dim_x = obj.dimensions.x
-            dim_y = obj.dimensions.y
+            record = fbx.stats.by_name[obj.name]
+            dim_x = record.dimensions[0]
+            dim_y = record.dimensions[1]
+            center = record.bounds_center
 
-            center = sum((mathutils.Vector(b) for b in obj.bound_box), mathutils.Vector())
-            center /= 8
-
-            offset_x = round(center.x * obj.scale.x / dim_x * 100, 2)
-            offset_y = round(center.y * obj.scale.y / dim_y * 100, 2)
+            offset_x = round(center[0] * record.scale[0] / dim_x * 100, 2)
+            offset_y = round(center[1] * record.scale[1] / dim_y * 100, 2)
 
             if offset_x > 10  or offset_y > 10:
                 check1.add_error(f"Точка отсчета смещена относительно геометрического центра (ось x: {offset_x}%, ось y: {offset_y}%)")
@@ -948,34 +963,28 @@ class HighpolyChecks():
                 for image_name in set.diffuse_set:
                     if image_name == None:
                         continue
-                    imPath = os.path.join(fbx.root, image_name)
-                    res = CheckUtils.get_image_size(os.path.join(imPath))[0]
-                    if res == 256:
-                        im = bpy.data.images.load(imPath, check_existing=True)
-                        if not CheckUtils.is_one_color_image(im):
+                    texture = fbx.get_texture(image_name)
+                    if texture.is_one_color is not None:
+                        if not texture.is_one_color:
                             check3.add_error(f"{image_name}: многоцветная заглушка")
-                        if CheckUtils.image_has_alpha(im):
+                        if texture.has_alpha:
                             check2.add_error(f"{image_name}: заглушка с альфа-каналом")
                 for image_name in set.erm_set:
                     if image_name == None:
                         continue
-                    imPath = os.path.join(fbx.root, image_name)
-                    im = bpy.data.images.load(imPath, check_existing=True)
-                    if CheckUtils.image_has_alpha(im):
+                    texture = fbx.get_texture(image_name)
+                    if texture.has_alpha:
                         check1.add_error(f"{image_name}: карта ERM с альфа-каналом")
-                    if im.size[0] == 256:
-                        if not CheckUtils.is_one_color_image(im):
-                            check3.add_error(f"{image_name}: многоцветная заглушка")
+                    if texture.is_one_color == False:
+                        check3.add_error(f"{image_name}: многоцветная заглушка")
                 for image_name in set.normal_set:
                     if image_name == None:
                         continue
-                    imPath = os.path.join(fbx.root, image_name)
-                    im = bpy.data.images.load(imPath, check_existing=True)
-                    if CheckUtils.image_has_alpha(im):
+                    texture = fbx.get_texture(image_name)
+                    if texture.has_alpha:
                         check1.add_error(f"{image_name}: карта Normal с альфа-каналом")
-                    if im.size[0] == 256:
-                        if not CheckUtils.is_one_color_image(im):
-                            check3.add_error(f"{image_name}: многоцветная заглушка")
+                    if texture.is_one_color == False:
+                        check3.add_error(f"{image_name}: многоцветная заглушка")
         return checks
 
 class LowpolyChecks():
@@ -986,21 +995,32 @@ class LowpolyChecks():
         self.lp_result_report = ""
         self.address = ""
         self.root_path = ""
+        self.project_index: project_index.ProjectIndex = None
         self.by_collections = False
     
-    def run_checks(self, lp_fbx_files):
+    def run_checks(self, lp_fbx_files, loader=None):
+        '''loader - ModelPreparer of streaming mode, fbx files are imported and removed one by one'''
+        for _ in self.iter_checks(lp_fbx_files, loader):
+            pass
+
+    def iter_checks(self, lp_fbx_files, loader=None):
+        '''Steps of run_checks, yields each checked fbx'''
         self._lp_fbx_files = lp_fbx_files
+        self.detect_address(lp_fbx_files)
         lp_checks = []
-        lp_checks.extend(self._check_naming_masks())
-        lp_checks.extend(self._check_transforms())
-        lp_checks.extend(self._check_polycount())
-        lp_checks.extend(self._check_duplicates())
-        lp_checks.extend(self._check_texel_dencity())
-        lp_checks.extend(self._check_fbx_objects())
-        lp_checks.extend(CheckUtils.check_files(True, self.root_path))
-        lp_checks.extend(self._check_materials())
-        lp_checks.extend(self._check_images())
-        lp_checks.extend(CheckUtils.check_color_attributes(lp_fbx_files))
+        for fbx in lp_fbx_files:
+            if fbx.cached_checks is not None:
+                lp_checks.extend(fbx.cached_checks)
+                continue
+            if loader is None:
+                lp_checks.extend(self._run_fbx_checks(fbx))
+            elif loader.load_fbx(fbx):
+                lp_checks.extend(self._run_fbx_checks(fbx))
+                loader.unload_fbx(fbx)
+            yield fbx
+        self._lp_fbx_files = lp_fbx_files
+        lp_checks.extend(self._check_fbx_count())
+        lp_checks.extend(CheckUtils.check_files(True, self.project_index))
 
         for check in lp_checks:
             if check.name not in self.lp_checks:
@@ -1014,6 +1034,35 @@ class LowpolyChecks():
 
         self._generate_result()
 
+    def _run_fbx_checks(self, fbx):
+        '''All checks of one fbx. fbx.checks is set only if checks were completed without errors'''
+        errors_count = handled_errors_count
+        self._lp_fbx_files = [fbx]
+        fbx.collect_stats()
+        checks = []
+        checks.extend(self._check_naming_masks())
+        checks.extend(self._check_transforms())
+        checks.extend(self._check_polycount())
+        checks.extend(self._check_duplicates())
+        checks.extend(self._check_texel_dencity())
+        checks.extend(self._check_fbx_objects())
+        checks.extend(self._check_materials())
+        checks.extend(self._check_images())
+        checks.extend(CheckUtils.check_color_attributes(self._lp_fbx_files))
+        fbx.checks = checks if handled_errors_count == errors_count else None
+        return checks
+
+    def run_fbx_check(self, fbx):
+        '''Checks of one imported fbx without project-level checks (worker process). Address must be detected by all fbx files'''
+        return self._run_fbx_checks(fbx)
+
+    def detect_address(self, fbx_files):
+        if self.address:
+            return
+        for fbx in fbx_files:
+            if "ground" in fbx.name.lower():
+                self.address = "_".join(fbx.name.split("_")[1:-1])
+
     def _generate_result(self):
         msg1 = ""
         msg2 = ""
@@ -1054,12 +1103,6 @@ class LowpolyChecks():
         checks = []
         # adress = self._fbx_files[0].name
         adress = self.address
-
-        if not adress:
-            for fbx in self._lp_fbx_files:
-                if "ground" in fbx.name.lower():
-                    adress = "_".join(fbx.name.split("_")[1:-1])
-                    self.address = adress
         
         common_address = adress
         
@@ -1197,7 +1240,7 @@ class LowpolyChecks():
         return checks
 
     @exception_handler
-    def _check_fbx_objects(self):
+    def _check_fbx_count(self):
         checks = []
         check2 = Check("Проверка файлов. Количество fbx", "", True, "таблица 2, п. 1, п/п 2", "", ["2.1.2"])
         checks.append(check2)
@@ -1206,11 +1249,20 @@ class LowpolyChecks():
         check5 = Check("Проверка файлов. Благоустройство 2", "", True, "таблица 2, п. 1, п/п 4-5, п. 3, п/п 3", "", ["2.3.3"])
         checks.append(check5)
 
-        ground_count = 0
-
         if len(self._lp_fbx_files) > 21:
             check2.add_error(f"Количество fbx-файлов превышает 21")
 
+        ground_count = len([fbx for fbx in self._lp_fbx_files if "ground" in fbx.name.lower()])
+        if ground_count == 0:
+            check4.add_error("Файлы благоустройства - неотъемлемая часть АГР и являются обязательными к исполнению.")
+        elif ground_count > 1:
+            check5.add_error("Благоустройство, его элементы и элементы растительности должны быть сформированы в отдельный файл fbx")
+
+        return checks
+
+    @exception_handler
+    def _check_fbx_objects(self):
+        checks = []
         for fbx in self._lp_fbx_files:
             check1 = Check("Проверка FBX. лишние обьекты", fbx.name, True, "таблица 2, п. 1, п/п 3, п. 3, п/п 5", "", ["2.1.3"])
             checks.append(check1)
@@ -1221,10 +1273,9 @@ class LowpolyChecks():
             checks.append(check3)
 
             if "ground" in fbx.name.lower():
-                ground_count += 1
                 required_meshes = ["Ground", "GroundEl", "Flora"]
-                for obj in fbx.meshes:
-                    obj_name = obj.name.lower()
+                for record in fbx.composition:
+                    obj_name = record.name_lower
                     if "ground" in obj_name and "groundel" not in obj_name and "glass" not in obj_name:
                         if ("Ground" in required_meshes): required_meshes.remove("Ground")
                     elif "groundel" in obj_name and "glass" not in obj_name:
@@ -1234,11 +1285,11 @@ class LowpolyChecks():
                 for mesh in required_meshes:
                     check3.add_error(f"Неверный состав файла благоустройства. Отсутствует меш {mesh}")
 
-            for obj in fbx.meshes:
-                if obj.type != 'MESH':
-                    check1.add_error(f"Лишний объект: {obj.name} ({obj.type})")
-                if obj.parent != None:
-                    check6.add_error(f"{obj.parent.name}: Объекты геометрии не должны иметь иерархических связей между собой")
+            for record in fbx.composition:
+                if record.type != 'MESH':
+                    check1.add_error(f"Лишний объект: {record.name} ({record.type})")
+                if record.parent_name != None:
+                    check6.add_error(f"{record.parent_name}: Объекты геометрии не должны иметь иерархических связей между собой")
             
             if fbx.objects_actions_count > 0:
                 check1.add_error(f"Лишние анимации: {fbx.objects_actions_count} шт.")
@@ -1247,11 +1298,6 @@ class LowpolyChecks():
             if fbx.objects_collections_count > 1:
                 check1.add_error(f"Лишние коллекции: {fbx.objects_collections_count - 1} шт.")
 
-        if ground_count == 0:
-            check4.add_error("Файлы благоустройства - неотъемлемая часть АГР и являются обязательными к исполнению.")
-        elif ground_count > 1:
-            check5.add_error("Благоустройство, его элементы и элементы растительности должны быть сформированы в отдельный файл fbx")
-
         return checks
 
     @exception_handler
@@ -1273,12 +1319,11 @@ class LowpolyChecks():
             check6 = Check("Проверка материалов. flora, обязательно diffuse", fbx.name, True, "", "", ["2.5.12"])
             checks.append(check6)
 
-            for obj in fbx.meshes:
-                obj_name = obj.name.lower()
-                if obj.type != 'MESH':
-                    continue
-                uvmap_count = len(obj.data.uv_layers)
-                mat_count = len(obj.data.materials)
+            for record in fbx.stats.meshes:
+                obj = record.obj
+                obj_name = record.name_lower
+                uvmap_count = record.uv_layers_count
+                mat_count = record.materials_count
 
                 if "ground" in obj_name and "groundel" not in obj_name and "glass" not in obj_name:
                     if mat_count > 20:
@@ -1290,7 +1335,7 @@ class LowpolyChecks():
                     check5.add_error(f"{obj.name}: количество материалов больше 1")
 
                 textures = []
-                for mat in obj.data.materials:
+                for mat in record.materials:
                     sizes = []
                     for node in mat.node_tree.nodes:
                         if node.bl_static_type == 'TEX_IMAGE':
@@ -1356,9 +1401,10 @@ class LowpolyChecks():
 class CheckUtils():
     @staticmethod
     @exception_handler
-    def check_files(check_lp, root_path):
+    def check_files(check_lp, project_index):
         all_checks = []
-        for root, dirs, files in os.walk(root_path):
+        for dir_entry in list(project_index.dirs.values()):
+            root = dir_entry.path
             check1 = Check("Проверка файлов. Формат", "", True, "таблица 2, п.1, п/п 2", "", ["2.1.2"])
             all_checks.append(check1)
 
@@ -1372,11 +1418,12 @@ class CheckUtils():
             all_checks.append(check4)
 
             lp_dir = os.path.basename(root)[:4].isdigit()
-            root_dir = root == root_path
+            root_dir = root == project_index.root_path
             if lp_dir != check_lp:
                 continue
 
-            for file in files:
+            for file_entry in dir_entry.files:
+                file = file_entry.name
                 if ".blend" in file:
                     continue
                 if os_utils.CHECKLIST_DATA_FOLDER_NAME in root:
@@ -1386,7 +1433,7 @@ class CheckUtils():
                     if lp_file != check_lp:
                         continue
                     check2.checked_count += 1
-                    file_size = os.path.getsize(os.path.join(root, file))
+                    file_size = file_entry.size
                     max_size = 1024 * 1048576 if check_lp else 500 * 1048576
                     if file_size > max_size:
                         check2.add_error(f"{file} ({file_size / 1048576} Mb)")
@@ -1410,40 +1457,26 @@ class CheckUtils():
 
     @staticmethod
     def create_udim_sets(root):
+        catalog = udim_catalog.get_catalog(root)
         udim_set = UdimSet()
-        files = [f for f in os.listdir(root) if ".png" in f.lower()]
-        if not files:
-            return udim_set
-
-        count = max([CheckUtils.udim_number(f) for f in files]) - 1000
-        udim_set.sets_count = count
-        udim_set.diffuse_set = [None for _ in range(count)]
-        udim_set.erm_set = [None for _ in range(count)]
-        udim_set.normal_set = [None for _ in range(count)]
-
-        for file in files:
-            ind = CheckUtils.udim_number(file) - 1000 - 1
-            if "diffuse" in file.lower() or "basecolor" in file.lower().replace(" ", ""):
-                # udim_set.diffuse_set.append(file)
-                udim_set.diffuse_set[ind] = file
-            elif "ERM" in file:
-                udim_set.erm_set[ind] = file
-            elif "normal" in file.lower():
-                udim_set.normal_set[ind] = file
-
-        for set in udim_set.collection:
-            max_res = 0
-            for file in set:
-                if file == None:
-                    continue
-                num = CheckUtils.udim_number(file)
-                res = CheckUtils.get_image_size(os.path.join(root, file))[0]
-                if res > max_res:
-                    max_res = res
-            if max_res != 0:
-                udim_set.resolutions_by_number[num] = max_res
+        udim_set.sets_count = catalog.sets_count
+        udim_set.diffuse_set = list(catalog.diffuse)
+        udim_set.erm_set = list(catalog.erm)
+        udim_set.normal_set = list(catalog.normal)
+        udim_set.resolutions_by_number = catalog.resolutions_by_number
         return udim_set
 
+    @staticmethod
+    def validate_fbx_textures(fbx_files):
+        '''Run texture validation stage for png files of all fbx folders at once'''
+        paths_by_fbx = dict()
+        for fbx in fbx_files:
+            catalog = udim_catalog.get_catalog(fbx.root)
+            paths_by_fbx[fbx] = [catalog.path(name) for name in catalog.png_files]
+        results = image_utils.validate_textures(path for paths in paths_by_fbx.values() for path in paths)
+        for fbx, paths in paths_by_fbx.items():
+            fbx.textures = {os.path.basename(path): results[path] for path in paths}
+
     @staticmethod
     def udim_number(name):
         num_str = name.split(".")[1]
@@ -1456,34 +1489,15 @@ class CheckUtils():
     
     @staticmethod
     def get_image_size(fname):
-        '''Determine the image type of fhandle and return its size.
-        from draco'''
-        with open(fname, 'rb') as fhandle:
-            head = fhandle.read(24)
-            if len(head) != 24:
-                return
-            if imghdr.what(fname) == 'png':
-                check = struct.unpack('>i', head[4:8])[0]
-                if check != 0x0d0a1a0a:
-                    return
-                width, height = struct.unpack('>ii', head[16:24])
-            else:
-                return
-            return width, height
+        '''Size of png image, None if file is not png'''
+        return image_utils.image_index.get_size(fname)
 
     @staticmethod
     def get_count_doubles(obj):
-        # bpy.ops.object.mode_set(mode='OBJECT')
-        obj.hide_set(False)
-        bpy.context.view_layer.objects.active = obj
-        bpy.ops.object.mode_set(mode='EDIT')
-        bm = bmesh.from_edit_mesh(obj.data)
-        # bmesh.ops.triangulate(bm, faces=bm.faces[:])
-        bm.faces.ensure_lookup_table()
-
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
         double_dist = 0.0015
-        select = bmesh.ops.find_doubles(bm, verts=bm.verts, keep_verts=[], dist=double_dist)
-        return len(select["targetmap"])
+        return mesh_utils.count_doubles(obj.data, double_dist)
 
     @staticmethod
     def uv_to_udim_number(x, y):
@@ -1510,61 +1524,26 @@ class CheckUtils():
 
     @staticmethod
     def check_mesh_convex(obj):
-        me = obj.data
         tolerance = max([obj.dimensions.x, obj.dimensions.y, obj.dimensions.z]) / 10
-        # if len(me.vertices) - len(me.edges) + len(me.polygons) != 2:
-            # logger.add("Неверная топология")
-            # return False
-        for poly in me.polygons:
-            verts = []
-            for i in poly.loop_indices:
-                v_ind = me.loops[i].vertex_index
-                verts.append(me.vertices[v_ind])
-            t1 = verts[0].co
-            t2 = verts[1].co
-            t3 = verts[2].co
-
-            a = t1.y*(t2.z - t3.z) + t2.y*(t3.z - t1.z) + t3.y*(t1.z - t2.z)
-            b = t1.z*(t2.x - t3.x) + t2.z*(t3.x - t1.x) + t3.z*(t1.x - t2.x)
-            c = t1.x*(t2.y - t3.y) + t2.x*(t3.y - t1.y) + t3.x*(t1.y - t2.y)
-            d =-( t1.x * (t2.y * t3.z - t3.y * t2.z) + t2.x * (t3.y * t1.z - t1.y * t3.z) + t3.x * (t1.y * t2.z - t2.y * t1.z))
-            
-            prev = 0
-            for vert in me.vertices:
-                if vert in verts:
-                    continue
-                v = vert.co
-                value = v.x * a + v.y * b + v.z * c + d
-                dist_coef = math.sqrt(a*a + b*b + c*c)
-                if dist_coef == 0:
-                    continue
-                dist = value / dist_coef
-
-                if dist < tolerance and dist > -tolerance:
-                    continue
-                
-                if prev == 0:
-                    prev = value
-                if value * prev < -0.001:
-                    return False
-            
-        return True
+        return mesh_utils.is_mesh_convex(obj.data, tolerance)
 
     @staticmethod
     def check_fbx_meshes_transforms(fbx, check, ignore_location=False):
         errors = []
-        for obj in fbx.meshes:
-            if "spot" in obj.name.lower() or "omni" in obj.name.lower():
+        vector_one = mathutils.Vector((1.0, 1.0, 1.0))
+        for record in fbx.stats:
+            if "spot" in record.name_lower or "omni" in record.name_lower:
                 continue
             check.checked_count += 1
-            vector_one = mathutils.Vector((1.0, 1.0, 1.0))
-            if not ignore_location and obj.location.length_squared > 0.0001:
-                errors.append(["Location", obj.name[:3], obj.name, f"{round(obj.location.x, 3)}, {round(obj.location.y, 3)}, {round(obj.location.z, 3)}"])
-            rotation_vector = mathutils.Vector((obj.rotation_euler.x, obj.rotation_euler.y, obj.rotation_euler.z))
+            location = mathutils.Vector(record.location)
+            if not ignore_location and location.length_squared > 0.0001:
+                errors.append(["Location", record.name[:3], record.name, f"{round(location.x, 3)}, {round(location.y, 3)}, {round(location.z, 3)}"])
+            rotation_vector = mathutils.Vector(record.rotation)
             if rotation_vector.length_squared > 0.001:
-                errors.append(["Rotation", obj.name[:3], obj.name, f"{round(math.degrees(rotation_vector.x), 3)}, {round(math.degrees(rotation_vector.y), 3)}, {round(math.degrees(rotation_vector.z), 3)}"])
-            if abs(obj.scale.length_squared - vector_one.length_squared) > 0.001:
-                errors.append(["Scale", obj.name[:3], obj.name, f"{round(obj.scale.x, 3)}, {round(obj.scale.y, 3)}, {round(obj.scale.z, 3)}"])
+                errors.append(["Rotation", record.name[:3], record.name, f"{round(math.degrees(rotation_vector.x), 3)}, {round(math.degrees(rotation_vector.y), 3)}, {round(math.degrees(rotation_vector.z), 3)}"])
+            scale = mathutils.Vector(record.scale)
+            if abs(scale.length_squared - vector_one.length_squared) > 0.001:
+                errors.append(["Scale", record.name[:3], record.name, f"{round(scale.x, 3)}, {round(scale.y, 3)}, {round(scale.z, 3)}"])
     
         errors = sorted(errors, key=lambda i: i[1])
 
@@ -1595,21 +1574,14 @@ class CheckUtils():
 
         # errors = []
         nontris_by_obj = dict()
-        for obj in fbx.meshes:
-            if obj.type != 'MESH':
-                continue
-            mesh = obj.data
-            for poly in mesh.polygons:
-                if "UCX" in obj.name:
-                    ucx_polycount += 1
-                else:
-                    polycount += 1
-                if len(poly.vertices) > 3:
-                    if obj.name not in nontris_by_obj.keys():
-                        nontris_by_obj[obj.name] = 1
-                    else:
-                        nontris_by_obj[obj.name] += 1
-                    nontriscount += 1
+        for record in fbx.stats.meshes:
+            if "UCX" in record.name:
+                ucx_polycount += record.polycount
+            else:
+                polycount += record.polycount
+            if record.nontris_count > 0:
+                nontris_by_obj[record.name] = record.nontris_count
+                nontriscount += record.nontris_count
         
         check1.checked_count = polycount + ucx_polycount
         check2.checked_count = polycount + ucx_polycount
@@ -1634,37 +1606,34 @@ class CheckUtils():
         if highpoly:
             if all([v == 256 for v in fbx.udim_set.resolutions_by_number.values()]):
                 return
-            calculated_obj_td_area, td_errors_less, td_errors_greater, udim_errors, not_uvmap_errors, udim_used_errors = CheckUtils._calculate_td(obj, fbx.udim_set.resolutions_by_number, True)
-        else:
-            calculated_obj_td_area, td_errors_less, td_errors_greater, udim_errors, not_uvmap_errors, udim_used_errors = CheckUtils._calculate_td(obj, {1001:resolution_lowpoly}, False)
-
-        if calculated_obj_td_area:
-            # average_td = sum(calculated_obj_td_area)/len(calculated_obj_td_area)
-            # td_min = min(calculated_obj_td_area)
-            # td_max = max(calculated_obj_td_area)
-            # check2.directory += f" (Средняя плотность пикселей={round(average_td, 2)}, минимальная={round(td_min, 2)}, максимальная={round(td_max, 2)})"
-            # check2.directory += f" (без учета опущенных вниз полигонов по периметру благоустройства)"
-            pass
+            calculated_count, td_errors_less, td_errors_greater, udim_errors, udim_errors_count, not_uvmap_errors, udim_used_errors = CheckUtils._calculate_td(obj, fbx.udim_set.resolutions_by_number, True)
         else:
+            calculated_count, td_errors_less, td_errors_greater, udim_errors, udim_errors_count, not_uvmap_errors, udim_used_errors = CheckUtils._calculate_td(obj, {1001:resolution_lowpoly}, False)
+
+        if not calculated_count:
             check2.add_error(f"Не удалось вычислить texel dencity")
 
         if td_errors_less:
             for key in td_errors_less:
+                largest_side, count, td_sum, area_sum = td_errors_less[key]
                 if highpoly:
-                    check2.add_error(f"UDIM {key}: полигоны < 512 px/m - {len(td_errors_less[key][1])} шт., Средняя плотность - {round(sum(td_errors_less[key][1])/len(td_errors_less[key][1]), 2)} px/m, Суммарная площадь - {round(sum(td_errors_less[key][2]), 2)} м2 (Разрешение текстуры - {td_errors_less[key][0]})")
+                    check2.add_error(f"UDIM {key}: полигоны < 512 px/m - {count} шт., Средняя плотность - {round(td_sum / count, 2)} px/m, Суммарная площадь - {round(area_sum, 2)} м2 (Разрешение текстуры - {largest_side})")
                 else:
-                    check2.add_error(f"{obj.name}: полигоны < 10 px/m - {len(td_errors_less[key][1])} шт., Средняя плотность - {round(sum(td_errors_less[key][1])/len(td_errors_less[key][1]), 2)} px/m, Суммарная площадь - {round(sum(td_errors_less[key][2]), 2)} м2 (Разрешение текстуры - {td_errors_less[key][0]})")
+                    check2.add_error(f"{obj.name}: полигоны < 10 px/m - {count} шт., Средняя плотность - {round(td_sum / count, 2)} px/m, Суммарная площадь - {round(area_sum, 2)} м2 (Разрешение текстуры - {largest_side})")
         if td_errors_greater:
             for key in td_errors_greater:
+                largest_side, count, td_sum, area_sum = td_errors_greater[key]
                 if highpoly:
-                    check2.add_error(f"UDIM {key}: полигоны > 1706 px/m - {len(td_errors_greater[key][1])} шт., Средняя плотность - {round(sum(td_errors_greater[key][1])/len(td_errors_greater[key][1]), 2)} px/m, Суммарная площадь - {round(sum(td_errors_greater[key][2]), 2)} м2 (Разрешение текстуры - {td_errors_greater[key][0]})")
+                    check2.add_error(f"UDIM {key}: полигоны > 1706 px/m - {count} шт., Средняя плотность - {round(td_sum / count, 2)} px/m, Суммарная площадь - {round(area_sum, 2)} м2 (Разрешение текстуры - {largest_side})")
                 else:
-                    check2.add_error(f"{obj.name}: полигоны > 40 px/m - {len(td_errors_greater[key][1])} шт., Средняя плотность - {round(sum(td_errors_greater[key][1])/len(td_errors_greater[key][1]), 2)} px/m, Суммарная площадь - {round(sum(td_errors_greater[key][2]), 2)} м2 (Разрешение текстуры - {td_errors_greater[key][0]})")
-        if udim_errors:
-            check1.add_error(f"Полигоны выходящие за границы UDIM: {len(udim_errors)} шт. ")
+                    check2.add_error(f"{obj.name}: полигоны > 40 px/m - {count} шт., Средняя плотность - {round(td_sum / count, 2)} px/m, Суммарная площадь - {round(area_sum, 2)} м2 (Разрешение текстуры - {largest_side})")
+        if udim_errors_count:
+            check1.add_error(f"Полигоны выходящие за границы UDIM: {udim_errors_count} шт. ")
             check1.add_error("Ориентировочные координаты в UV пространстве:")
-            uv_min = min(udim_errors)
-            uv_max = max(udim_errors)
+            uvs = udim_errors.reshape(-1, 2)
+            order = np.lexsort((uvs[:, 1], uvs[:, 0]))
+            uv_min = uvs[order[0]]
+            uv_max = uvs[order[-1]]
             check1.add_error(f"    Минимальная точка по x uv=({round(uv_min[0], 2)}, {round(uv_min[1], 2)}), Максимальная точка по x uv=({round(uv_max[0], 2)}, {round(uv_max[1], 2)})")
         if udim_used_errors:
             # Неиспользуемая текстура, UDIM 
@@ -1674,99 +1643,38 @@ class CheckUtils():
     @staticmethod
     def _calculate_td(obj, udim_resolutions, highpoly):
         # udim_resolutions = {1001: 4096, 1002: 256, 1003: 2048}
-        out_udim_errors = []
+        # errors by udim - [texture size, triangles count, texel density sum, area sum]
+        # out of UDIM errors - uv of triangles (for coordinates hint) and count of their polygons
         td_errors_less = dict()
         td_errors_greater = dict()
         not_uvmap_errors = []
-        calculated_obj_td_list = []
-
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.context.view_layer.objects.active = obj
-        bpy.ops.object.transform_apply(location=False, rotation=False, scale=True, properties=False)
-        bpy.ops.object.mode_set(mode='EDIT')
-        bm = bmesh.from_edit_mesh(obj.data)
-        bmesh.ops.triangulate(bm, faces=bm.faces[:])
-        bm.faces.ensure_lookup_table()
-
-        face_count = len(obj.data.polygons)
-        udims_used = set()
+        out_udim_errors = np.empty((0, 3, 2))
 
-        vector_up = mathutils.Vector((0, 0, 1.0))
-
-        for x in range(0, face_count):
-            if not highpoly and round(math.degrees(obj.data.polygons[x].normal.angle(vector_up))) == 90:
-                continue
-            area = 0
-            loops = []
-            try:
-                for loop in bm.faces[x].loops:
-                    loops.append(loop[bm.loops.layers.uv.active].uv)
-            except:
-                not_uvmap_errors.append(f"cant find BMLayerItem in bm.loops.layers.uv.active={bm.loops.layers.uv.active}, obj={obj.name}")
-                continue
-            loops_count = len(loops)
-            a = loops_count - 1
-
-            if highpoly:
-                udim_nums = [CheckUtils.uv_to_udim_number(loops[i].x, loops[i].y) for i in range(loops_count)]
-                [udims_used.add(num) for num in udim_nums]
-                # check if all points fall into one tile and tile exist in udims
-                if not all(num == udim_nums[0] for num in udim_nums) or udim_nums[0] not in udim_resolutions.keys():
-                    [out_udim_errors.append((loops[i].x, loops[i].y)) for i in range(loops_count)]
-                    continue
-                udim_num = udim_nums[0]
-            else:
-                udim_num = 1001
-
-            largest_side = udim_resolutions[udim_num]
-            if largest_side == None:
-                continue
-            if largest_side <= 256:
-                continue
-            
-            for b in range(0, loops_count):
-                area += (loops[a].x + loops[b].x) * (loops[a].y - loops[b].y)
-                a = b
-            
-            area = abs(0.5 * area)
-            gm_area = obj.data.polygons[x].area
+        triangles = texel_density.get_mesh_triangles(obj)
+        if triangles is None:
+            not_uvmap_errors.append(f"cant find active uv layer, obj={obj.name}")
+            return 0, td_errors_less, td_errors_greater, out_udim_errors, 0, not_uvmap_errors, []
 
-            if gm_area > 0 and area > 0:
-                aspect_ratio = 1
-                texel_density = ((largest_side / math.sqrt(aspect_ratio)) * math.sqrt(area))/(math.sqrt(gm_area)*100) / bpy.context.scene.unit_settings.scale_length
-            else:
-                texel_density = 0.0001
+        udims, evaluated, out_udim, td, udims_used = texel_density.evaluate_triangles(triangles, udim_resolutions, use_udims=highpoly, skip_vertical=not highpoly)
+        out_udim_errors = triangles.uv[out_udim]
+        out_udim_count = len(np.unique(triangles.poly_indices[out_udim]))
 
-            texel_density = texel_density * 100
+        if highpoly:
+            texel_min, texel_max = 512, 1706
+        else:
+            texel_min, texel_max = 10, 40
 
-            if highpoly:
-                texel_min, texel_max = 512, 1706
-            else:
-                texel_min, texel_max = 10, 40
-            if texel_density < texel_min:
-                if udim_num not in td_errors_less.keys():
-                    td_errors_less[udim_num] = [largest_side, [], []]
-                td_errors_less[udim_num][1].append(round(texel_density, 2))
-                td_errors_less[udim_num][2].append(round(gm_area, 2))
-                # td_errors.append(f"texel density error {texel_density} px/m, udim:{udim_num}, tex_size={largest_side}px, sqrt_area={math.sqrt(gm_area)}m")
-            elif texel_density > texel_max:
-                if udim_num not in td_errors_greater.keys():
-                    td_errors_greater[udim_num] = [largest_side, [], []]
-                td_errors_greater[udim_num][1].append(round(texel_density, 2))
-                td_errors_greater[udim_num][2].append(round(gm_area, 2))
-                # td_errors.append(f"texel density error {texel_density} px/m, udim:{udim_num}, tex_size={largest_side}px, sqrt_area={math.sqrt(gm_area)}m")
-
-            # td_area_list = texel_density
-            calculated_obj_td_list.append(texel_density)
+        for td_errors, errors_mask in [(td_errors_less, evaluated & (td < texel_min)), (td_errors_greater, evaluated & (td > texel_max))]:
+            for udim_num in np.unique(udims[errors_mask]).tolist():
+                udim_mask = errors_mask & (udims == udim_num)
+                td_errors[udim_num] = [udim_resolutions[udim_num], int(np.count_nonzero(udim_mask)), float(td[udim_mask].sum()), float(triangles.area[udim_mask].sum())]
 
         udim_used_errors = []
         for key in udim_resolutions.keys():
             if key not in udims_used:
                 udim_used_errors.append(f"{key}")
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        return calculated_obj_td_list, td_errors_less, td_errors_greater, out_udim_errors, not_uvmap_errors, udim_used_errors
+        return int(np.count_nonzero(evaluated)), td_errors_less, td_errors_greater, out_udim_errors, out_udim_count, not_uvmap_errors, udim_used_errors
 
     @staticmethod
     def lp_get_suffix(mesh):
@@ -1786,13 +1694,10 @@ class CheckUtils():
             return r"_\d\d\d_Main"
 
     @staticmethod
-    def create_bvh_tree_from_object(obj):
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.transform(obj.matrix_world)
-        bvh = mathutils.bvhtree.BVHTree.FromBMesh(bm)
-        bm.free()
-        return bvh
+    def create_bvh_tree_from_object(obj, world_co=None):
+        if world_co is None:
+            world_co = mesh_utils.get_world_co(obj)
+        return mathutils.bvhtree.BVHTree.FromPolygons(world_co.tolist(), mesh_utils.get_polygons_vertices(obj.data))
 
     @staticmethod
     def check_bvh_intersection(obj_1, obj_2):
@@ -1801,52 +1706,43 @@ class CheckUtils():
         return bvh1.overlap(bvh2)
 
     @staticmethod
-    def _is_polygon_flipped(points):
-        area = 0.0
-        for i in range(len(points)):
-            uv1 = points[i]
-            uv2 = points[(i + 1) % len(points)]
-            a = uv1.x * uv2.y - uv1.y * uv2.x
-            area = area + a
-        if area < 0:
-            # clock-wise
-            return True
-        return False
+    def find_intersecting_pairs(objects):
+        '''Pairs of intersecting mesh objects. BVH tree of every object is built once,
+        candidate pairs are found by sweep and prune of world bounding boxes'''
+        objects = [obj for obj in objects if len(obj.data.polygons) > 0]
+        if len(objects) < 2:
+            return []
+        bounds_min = np.empty((len(objects), 3))
+        bounds_max = np.empty((len(objects), 3))
+        bvh_trees = []
+        for i, obj in enumerate(objects):
+            world_co = mesh_utils.get_world_co(obj)
+            bounds_min[i] = world_co.min(axis=0) - 0.0001
+            bounds_max[i] = world_co.max(axis=0) + 0.0001
+            bvh_trees.append(CheckUtils.create_bvh_tree_from_object(obj, world_co))
+
+        pairs = []
+        for i, j in mesh_utils.sweep_and_prune(bounds_min, bounds_max):
+            if bvh_trees[i].overlap(bvh_trees[j]):
+                pairs.append((objects[i], objects[j]))
+        return pairs
 
     @staticmethod
-    def get_flipped_count(faces, uv_layer):
-        flipped_uvs_count = 0
-        for f in faces:
-            polygon = [l[uv_layer].uv.copy() for l in f.loops]
-            if CheckUtils._is_polygon_flipped(polygon):
-                flipped_uvs_count += 1
-        return flipped_uvs_count
+    def get_flipped_polygons(obj):
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+        return mesh_utils.get_flipped_polygons(obj.data)
 
     @staticmethod
-    def image_has_alpha(bl_img):
-        b = 32 if bl_img.is_float else 8
-        return (
-            bl_img.depth == 2*b or   # Grayscale+Alpha
-            bl_img.depth == 4*b      # RGB+Alpha
-        )
+    def image_has_alpha(fname):
+        '''Alpha channel by png header (color type or tRNS chunk), image is not loaded'''
+        info = image_utils.image_index.get(fname)
+        return info is not None and info.has_alpha
 
     @staticmethod
-    def is_one_color_image(bl_img):
-        def rnd(v):
-            return round(v, 3)
-        pixels = bl_img.pixels[:]
-        prev_px = [rnd(pixels[0]), rnd(pixels[1]), rnd(pixels[2]), rnd(pixels[3])]
-        cur_px = [rnd(pixels[4]), 0, 0, 0]
-        for i, p in enumerate(pixels):
-            if i < 5:
-                continue
-            cur_px[i % 4] = rnd(p)
-            if i % 4 == 0:
-                if prev_px != cur_px:
-                    return False
-                    break
-                prev_px = cur_px
-        return True
+    def is_one_color_image(fname):
+        '''Solid colour test by streamed png data, image is not loaded'''
+        return image_utils.is_one_color_png(fname)
 
     @staticmethod
     def arrange_nodes(node_tree, principled_node):
@@ -1890,15 +1786,13 @@ class CheckUtils():
             check = Check("Проверка FBX. Color attributes", fbx.name, True, "", "", ["4.1.1"])
             checks.append(check)
             ucx_errors = []
-            for obj in fbx.meshes:
-                if obj.type != 'MESH':
-                    continue
-                if len(obj.data.color_attributes) > 0:
-                    if "ucx" in obj.name.lower():
+            for record in fbx.stats.meshes:
+                if record.color_attributes_count > 0:
+                    if record.role == "ucx":
                         if len(ucx_errors) < 5:
-                            ucx_errors.append(f"{obj.name}")
+                            ucx_errors.append(f"{record.name}")
                     else:
-                        check.add_error(f"{obj.name}")
+                        check.add_error(f"{record.name}")
             for er in ucx_errors:
                 check.add_error(er)
             if len(ucx_errors) == 5:
@@ -1922,6 +1816,19 @@ class Check():
         self.verified = False
         self.error_list.append(err)
 
+    def to_dict(self):
+        return {"name": self.name, "directory": self.directory, "verified": self.verified, "paragraph": self.paragraph,
+                "units_text": self.units_text, "paragraph_ids": self.paragraph_ids, "comment": self.comment,
+                "error_list": self.error_list, "checked_count": self.checked_count}
+
+    @staticmethod
+    def from_dict(data):
+        check = Check(data["name"], data["directory"], data["verified"], data["paragraph"], data["units_text"], data["paragraph_ids"])
+        check.comment = data["comment"]
+        check.error_list = data["error_list"]
+        check.checked_count = data["checked_count"]
+        return check
+
 class UdimSet():
     def __init__(self):
         self.diffuse_set = []
@@ -1945,6 +1852,13 @@ class ModelPreparer():
         self.prepare_checks = []
         self.root_path = ""
         self.by_collections = False
+        self.address = ""
+        self.results_cache = None
+        self.project_index: project_index.ProjectIndex = None
+        # import, check and remove fbx files one by one
+        self.streaming = False
+        # fbx lists are created without import, fbx files are imported by load_fbx one by one
+        self.deferred_import = False
     
     def check_if_has_lp_hp(self):
         has_lp = False
@@ -1958,14 +1872,7 @@ class ModelPreparer():
                 if has_lp and has_hp:
                     return has_lp, has_hp
         else:
-            for root, dirs, files in os.walk(self.root_path):
-                for file in files:
-                    if file[:4].isdigit():
-                        has_lp = True
-                    if file.startswith("SM_"):
-                        has_hp = True
-                    if has_lp and has_hp:
-                        return has_lp, has_hp
+            return self.project_index.has_lp_hp()
         return has_lp, has_hp
 
     @exception_handler
@@ -1973,17 +1880,15 @@ class ModelPreparer():
         # items = [f for f in os.listdir(bpy.path.abspath("//")) if os.path.isfile(os.path.join(root, f))]
         if not self.by_collections:
             root = self.root_path
-            items = [f for f in os.listdir(root)]
-            for item in items:
+            zip_names = []
+            for item in self.project_index.zip_names:
                 # if item[:4].isdigit(): # low poly not extract
                 #     continue
-                if item.endswith(".zip"):
-                    if "Ground" not in item and not item[:4].isdigit():
-                        self.oks_count += 1
-                    if item[:-4] not in items:
-                        logger.add(f"Извлечение архива {item}")
-                        with zipfile.ZipFile(os.path.join(root, item), 'r') as zip_ref:
-                            zip_ref.extractall(os.path.join(root, item[:-4]).rstrip())
+                if "Ground" not in item and not item[:4].isdigit():
+                    self.oks_count += 1
+                zip_names.append(item)
+            if zip_extractor.extract_archives(root, zip_names):
+                self.project_index.refresh()
 
     @exception_handler
     def import_lowpoly_models(self, firstImport=True):
@@ -1992,48 +1897,122 @@ class ModelPreparer():
                 if collection.name[:4].isdigit():
                     image_path = ""
                     zip_name = "unknown"
-                    for root, dirs, files in os.walk(self.root_path):
+                    for root, dirs, files in self.project_index.walk():
                         if root == collection.name.replace(".fbx", ""):
                             image_path = root
                             zip_name = os.path.basename(root) + ".zip"
 
                     fbx = FbxFile(collection.name, image_path)
+                    fbx.collection = collection
                     fbx.meshes = collection.all_objects
                     fbx.zip_name = zip_name
                     self.lp_fbx_files.append(fbx)
         else:
             if firstImport:
                 self._clear_blender_file()
-            for root, dirs, files in os.walk(self.root_path):
+            fbx_names = [file for root, file in self.project_index.fbx_files(lowpoly=True)]
+            for root, dirs, files in self.project_index.walk():
                 for file in files:
                     if file[:4].isdigit() and file.lower().endswith(".fbx"): # low poly
-                        if firstImport:
-                            temp_objects = bpy.data.objects[:]
-                            actions_count = len(bpy.data.actions)
-                            cameras_count = len(bpy.data.cameras)
-                            collections_count = len(bpy.data.collections)
-                        # else:
-                        collection = bpy.data.collections.new(file)
-                        bpy.context.scene.collection.children.link(collection)
-                        bpy.context.view_layer.active_layer_collection = bpy.context.view_layer.layer_collection.children[-1]
-                        bpy.ops.import_scene.fbx(filepath = os.path.join(root, file))
-                        if firstImport:
-                            fbx = FbxFile(file, root)
-                            fbx.meshes = set(bpy.data.objects) - set(temp_objects)
-                            fbx.objects_actions_count = len(bpy.data.actions) - actions_count
-                            fbx.objects_cameras_count = len(bpy.data.cameras) - cameras_count
-                            fbx.objects_collections_count = len(bpy.data.collections) - collections_count
+                        if not firstImport:
+                            self._import_fbx(root, file)
+                        else:
+                            fbx = self._create_fbx_file(root, file, fbx_names)
                             fbx.zip_name = os.path.basename(root) + ".zip"
                             self.lp_fbx_files.append(fbx)
-                            mat_names_to_remove = set()
-                            for obj in fbx.meshes:
-                                for i, mat in enumerate(obj.data.materials):
-                                    if mat.name.lower().startswith("m_glass") and mat.name.endswith(".001") and mat.name.replace(".001", "") in bpy.data.materials:
-                                        mat_names_to_remove.add(mat.name)
-                                        obj.data.materials[i] = bpy.data.materials[mat.name.replace(".001", "")]
-                            for mat_name in mat_names_to_remove:
-                                bpy.data.materials.remove(bpy.data.materials[mat_name])
-        [logger.add("imported lowpoly: " + fbx.file_name) for fbx in self.lp_fbx_files]
+                            if fbx.cached_checks is not None or self.streaming or self.deferred_import:
+                                continue
+                            self._import_fbx(root, file, fbx)
+                            self._merge_glass_materials(fbx)
+        [logger.add("imported lowpoly: " + fbx.file_name) for fbx in self.lp_fbx_files if fbx.collection is not None]
+
+    def _merge_glass_materials(self, fbx):
+        mat_names_to_remove = set()
+        for obj in fbx.meshes:
+            for i, mat in enumerate(obj.data.materials):
+                if mat.name.lower().startswith("m_glass") and mat.name.endswith(".001") and mat.name.replace(".001", "") in bpy.data.materials:
+                    mat_names_to_remove.add(mat.name)
+                    obj.data.materials[i] = bpy.data.materials[mat.name.replace(".001", "")]
+        for mat_name in mat_names_to_remove:
+            bpy.data.materials.remove(bpy.data.materials[mat_name])
+
+    @exception_handler
+    def load_fbx(self, fbx):
+        '''Import one fbx of streaming mode'''
+        self._import_fbx(fbx.root, fbx.file_name, fbx)
+        if fbx.file_name[:4].isdigit():
+            self._merge_glass_materials(fbx)
+        logger.add(f"imported {fbx.file_name}")
+        return True
+
+    def iter_load_fbx_files(self, fbx_files):
+        '''Import deferred fbx files one by one, yields each fbx'''
+        for fbx in fbx_files:
+            if fbx.cached_checks is not None:
+                continue
+            self.load_fbx(fbx)
+            yield fbx
+
+    @exception_handler
+    def unload_fbx(self, fbx):
+        '''Remove fbx checked in streaming mode and purge all data blocks left without users (meshes, materials, images)'''
+        collection = fbx.collection
+        fbx.collection = None
+        fbx.meshes = []
+        fbx._stats = None
+        if collection is None:
+            return
+        for obj in list(collection.all_objects):
+            bpy.data.objects.remove(obj, do_unlink=True)
+        for child in list(collection.children_recursive):
+            bpy.data.collections.remove(child)
+        bpy.data.collections.remove(collection)
+        texel_density.clear_cache()
+        bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+    def _import_fbx(self, root, file, fbx=None):
+        '''Import fbx into its own new collection. Imported objects are taken from this collection
+        and data blocks counts are compared by lengths, so cost does not depend on objects already in file'''
+        actions_count = len(bpy.data.actions)
+        cameras_count = len(bpy.data.cameras)
+        collections_count = len(bpy.data.collections)
+        collection = bpy.data.collections.new(file)
+        bpy.context.scene.collection.children.link(collection)
+        bpy.context.view_layer.active_layer_collection = bpy.context.view_layer.layer_collection.children[-1]
+        bpy.ops.import_scene.fbx(filepath = os.path.join(root, file))
+        if fbx is not None:
+            fbx.collection = collection
+            fbx.meshes = list(collection.all_objects)
+            fbx.objects_collections_count = len(bpy.data.collections) - collections_count
+            if fbx.inventory is None:
+                fbx.objects_actions_count = len(bpy.data.actions) - actions_count
+                fbx.objects_cameras_count = len(bpy.data.cameras) - cameras_count
+        return collection
+
+    def _create_fbx_file(self, root, file, fbx_names):
+        '''FbxFile with results cache key. Cached checks are loaded if fbx and its folder were not changed since last check,
+        otherwise objects inventory is read from binary fbx before import'''
+        fbx = FbxFile(file, root)
+        fbx_path = os.path.join(root, file)
+        if self.results_cache is not None:
+            context = f"{self.address}|{self.oks_count}|{','.join(sorted(fbx_names))}"
+            fbx.cache_key = self.results_cache.fbx_key(fbx_path, context, self.project_index.get_dir(root).files)
+            checks_data = self.results_cache.get(fbx_path, fbx.cache_key)
+            if checks_data is not None:
+                fbx.cached_checks = [Check.from_dict(data) for data in checks_data]
+                logger.add(f"Результаты проверок {file} загружены из кэша")
+                return fbx
+        fbx.read_inventory()
+        return fbx
+
+    @exception_handler
+    def save_results_cache(self, fbx_files):
+        if self.results_cache is None:
+            return
+        for fbx in fbx_files:
+            if fbx.cache_key is None or fbx.checks is None:
+                continue
+            self.results_cache.put(os.path.join(fbx.root, fbx.file_name), fbx.cache_key, [check.to_dict() for check in fbx.checks])
 
     @exception_handler
     def import_highpoly_models(self, clear=True):
@@ -2043,7 +2022,7 @@ class ModelPreparer():
                     image_path = ""
                     json_name = ""
                     zip_name = ""
-                    for root, dirs, files in os.walk(self.root_path):
+                    for root, dirs, files in self.project_index.walk():
                         col_name = collection.name.replace(".fbx", "")
                         # logger.add(f"root compare {col_name}   {root}")
                         if root.endswith(collection.name.replace(".fbx", "").replace("_Light", "")):
@@ -2054,6 +2033,7 @@ class ModelPreparer():
                             zip_name = os.path.basename(root) + ".zip"
 
                     fbx = FbxFile(collection.name, image_path)
+                    fbx.collection = collection
                     fbx.meshes = collection.all_objects
                     # fbx.zip_name = collection.name.replace(".fbx", "").replace("_Light", "") + ".zip"
                     fbx.zip_name = zip_name
@@ -2066,31 +2046,21 @@ class ModelPreparer():
             if clear:
                 self._clear_blender_file()
             root_fbx_geojson = dict()
-            for root, dirs, files in os.walk(self.root_path):
+            fbx_names = [file for root, file in self.project_index.fbx_files(lowpoly=False)]
+            for root, dirs, files in self.project_index.walk():
                 root_fbx_geojson[root] = [[], None]
                 json_count = 0
                 for file in files:
                     if file[:4].isdigit(): # low poly
                         continue
                     if file.lower().endswith(".fbx"):
-                        temp_objects = bpy.data.objects[:]
-                        actions_count = len(bpy.data.actions)
-                        cameras_count = len(bpy.data.cameras)
-                        collections_count = len(bpy.data.collections)
-                        collection = bpy.data.collections.new(file)
-                        bpy.context.scene.collection.children.link(collection)
-                        bpy.context.view_layer.active_layer_collection = bpy.context.view_layer.layer_collection.children[-1]
-                        bpy.ops.import_scene.fbx(filepath = os.path.join(root, file))
-                        fbx = FbxFile(file, root)
-
-                        fbx.meshes = list(set(bpy.data.objects) - set(temp_objects))
-                        fbx.objects_actions_count = len(bpy.data.actions) - actions_count
-                        fbx.objects_cameras_count = len(bpy.data.cameras) - cameras_count
-                        fbx.objects_collections_count = len(bpy.data.collections) - collections_count
-
+                        fbx = self._create_fbx_file(root, file, fbx_names)
                         fbx.zip_name = os.path.basename(root) + ".zip"
                         self.hp_fbx_files.append(fbx)
                         root_fbx_geojson[root][0].append(fbx)
+                        if fbx.cached_checks is not None or self.streaming or self.deferred_import:
+                            continue
+                        self._import_fbx(root, file, fbx)
                     elif file.endswith(".geojson"):
                         json_count += 1
                         root_fbx_geojson[root][1] = file
@@ -2099,7 +2069,7 @@ class ModelPreparer():
                 # if json_count > 1:
                     # check1.add_error("Более одного geojson файла")
         
-            [logger.add("imported highpoly: " + fbx.file_name) for fbx in self.hp_fbx_files]
+            [logger.add("imported highpoly: " + fbx.file_name) for fbx in self.hp_fbx_files if fbx.collection is not None]
 
             for key in root_fbx_geojson:
                 # check2 = Check("Проверка файлов. Наличие geojson.", key, True, "таблица 2, п. 1, п/п 2", "", ["2.1.2"])
@@ -2275,6 +2245,7 @@ class ModelPreparer():
             CheckUtils.arrange_nodes(mat.node_tree, principled_BSDF)
 
     def _clear_blender_file(self):
+        texel_density.clear_cache()
         for img in reversed(bpy.data.images):
             bpy.data.images.remove(img)
         for obj in reversed(bpy.data.objects):
@@ -2336,9 +2307,52 @@ class FbxFile():
         self.objects_collections_count = 0
         self.objects_materials = []
         self.objects_images = []
+        self.textures = dict()
+        self._stats = None
+        self.collection = None
+
+        self.cache_key = None
+        # checks made without import in this process: loaded from results cache or returned by worker process
+        self.cached_checks = None
+        # own checks of fbx, None if checks raised errors
+        self.checks = None
+        self.inventory: fbx_inventory.FbxInventory = None
 
     def create_udim_set(self):
         self.udim_set = CheckUtils.create_udim_sets(self.root)
+
+    def collect_stats(self):
+        '''Read data of all fbx objects used by checks in one pass'''
+        self._stats = mesh_stats.MeshStats(self.meshes)
+        return self._stats
+
+    def read_inventory(self):
+        '''Objects, animations and cameras from binary fbx without import. Ascii files are left to import'''
+        self.inventory = fbx_inventory.read_inventory(os.path.join(self.root, self.file_name))
+        if self.inventory is not None:
+            self.objects_actions_count = self.inventory.actions_count
+            self.objects_cameras_count = self.inventory.cameras_count
+        return self.inventory
+
+    @property
+    def composition(self):
+        '''Objects for composition checks: fbx inventory if file was scanned, otherwise imported objects'''
+        if self.inventory is not None:
+            return self.inventory
+        return self.stats
+
+    def get_texture(self, image_name):
+        texture = self.textures.get(image_name)
+        if texture is None:
+            texture = image_utils.validate_texture(os.path.join(self.root, image_name))
+            self.textures[image_name] = texture
+        return texture
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            self.collect_stats()
+        return self._stats
     
     @property
     def name(self):
@@ -2379,6 +2393,7 @@ def import_models():
     preparer = ModelPreparer()
     preparer.root_path = root_path
     preparer.by_collections = False
+    preparer.project_index = project_index.ProjectIndex(root_path)
 
     has_lp, has_hp = preparer.check_if_has_lp_hp()
     preparer.unzip()
@@ -2401,7 +2416,25 @@ def import_models():
     if has_lp:
         preparer.import_lowpoly_models(firstImport=False)
 
-def run(bl_operator, address, root_path, by_collections):
+def run(bl_operator, address, root_path, by_collections, use_cache=False, streaming=False):
+    '''streaming - import, check and remove fbx files one by one, models are not left in scene'''
+    progress = check_progress.CheckProgress()
+    for _ in iter_run(progress, bl_operator, address, root_path, by_collections, use_cache, streaming):
+        pass
+    return progress.result
+
+def track_fbx_steps(progress, steps):
+    '''Advance progress by each fbx yielded by steps generator'''
+    step_start = time.time()
+    for fbx in steps:
+        progress.advance(check_progress.fbx_work(fbx), time.time() - step_start, fbx.file_name)
+        yield progress
+        step_start = time.time()
+
+def iter_run(progress, bl_operator, address, root_path, by_collections, use_cache=False, streaming=False, deferred_import=False):
+    '''Steps of run. Yields progress after each stage and each checked fbx, so caller can redraw UI between steps.
+    deferred_import - fbx files are imported one per step too (modal operator), otherwise all at once as in run.
+    If generator is closed before the end, imported models are removed. Result is set to progress.result'''
     global start_time
     start_time = time.time()
     # address = ""
@@ -2411,58 +2444,106 @@ def run(bl_operator, address, root_path, by_collections):
 
     project_data = ProjectData()
     lp_result, hp_result = None, None
+    progress.result = (lp_result, hp_result, project_data)
 
     if not root_path:
-        return (lp_result, hp_result, project_data)
+        return
 
     preparer = ModelPreparer()
     preparer.root_path = root_path
     preparer.by_collections = by_collections
-
+    preparer.address = address
+    preparer.project_index = project_index.ProjectIndex(root_path)
+    if use_cache and not by_collections:
+        preparer.results_cache = result_cache.ResultCache(root_path)
+    preparer.streaming = streaming and not by_collections
+    preparer.deferred_import = deferred_import and not by_collections
+    loader = preparer if preparer.streaming else None
+    load_step = preparer.deferred_import and not preparer.streaming
+    phases = 2 if load_step else 1
+
+    progress.start_stage("Распаковка архивов")
     has_lp, has_hp = preparer.check_if_has_lp_hp()
     preparer.unzip()
-
-    preparer.clear_images()
     if has_lp:
-        preparer.import_lowpoly_models()
-        lowpoly_checks = LowpolyChecks()
-        lowpoly_checks.by_collections = by_collections
-        lowpoly_checks.address = address
-        lowpoly_checks.root_path = root_path
-        lowpoly_checks.run_checks(preparer.lp_fbx_files)
-        lp_result = lowpoly_checks.lp_checks_by_ids
-        project_data.address = lowpoly_checks.address
-
+        progress.set_total("lp", check_progress.estimate_work(preparer.project_index, True, phases))
     if has_hp:
-        preparer.import_highpoly_models()
-        if by_collections:
-            preparer.clear_highpoly_before_check_by_collections()
-
-        highpoly_checks = HighpolyChecks()
-        highpoly_checks.address = address
-        highpoly_checks.root_path = root_path
-        highpoly_checks.run_meshes_check(preparer.hp_fbx_files, preparer.oks_count, bl_operator)
-
-        preparer.fix_coordinates()
-        preparer.material_textures_set()
-
-        highpoly_checks.add_checks(preparer.prepare_checks)
-        highpoly_checks.generate_result()
-        hp_result = highpoly_checks.hp_checks_by_ids
-
-        project_data.address = highpoly_checks.address
-
-    if has_lp and has_hp:
-        preparer.import_lowpoly_models(firstImport=False)
+        progress.set_total("hp", check_progress.estimate_work(preparer.project_index, False, phases))
+    yield progress
+
+    imported = False
+    try:
+        preparer.clear_images()
+        if has_lp:
+            progress.start_stage("Импорт НПМ")
+            imported = not by_collections
+            preparer.import_lowpoly_models()
+            progress.set_total("lp", phases * sum(check_progress.fbx_work(fbx) for fbx in preparer.lp_fbx_files if fbx.cached_checks is None))
+            if load_step:
+                yield from track_fbx_steps(progress, preparer.iter_load_fbx_files(preparer.lp_fbx_files))
+
+            progress.start_stage("Проверка НПМ")
+            lowpoly_checks = LowpolyChecks()
+            lowpoly_checks.by_collections = by_collections
+            lowpoly_checks.address = address
+            lowpoly_checks.root_path = root_path
+            lowpoly_checks.project_index = preparer.project_index
+            yield from track_fbx_steps(progress, lowpoly_checks.iter_checks(preparer.lp_fbx_files, loader))
+            preparer.save_results_cache(preparer.lp_fbx_files)
+            lp_result = lowpoly_checks.lp_checks_by_ids
+            project_data.address = lowpoly_checks.address
+
+        if has_hp:
+            progress.start_stage("Импорт ВПМ")
+            imported = not by_collections
+            preparer.import_highpoly_models()
+            if by_collections:
+                preparer.clear_highpoly_before_check_by_collections()
+            progress.set_total("hp", phases * sum(check_progress.fbx_work(fbx) for fbx in preparer.hp_fbx_files if fbx.cached_checks is None))
+            if load_step:
+                yield from track_fbx_steps(progress, preparer.iter_load_fbx_files(preparer.hp_fbx_files))
+
+            progress.start_stage("Проверка ВПМ")
+            highpoly_checks = HighpolyChecks()
+            highpoly_checks.address = address
+            highpoly_checks.root_path = root_path
+            highpoly_checks.project_index = preparer.project_index
+            yield from track_fbx_steps(progress, highpoly_checks.iter_meshes_check(preparer.hp_fbx_files, preparer.oks_count, bl_operator, loader))
+            preparer.save_results_cache(preparer.hp_fbx_files)
+
+            progress.start_stage("Координаты и материалы ВПМ")
+            yield progress
+            preparer.fix_coordinates()
+            preparer.material_textures_set()
+
+            highpoly_checks.add_checks(preparer.prepare_checks)
+            highpoly_checks.generate_result()
+            hp_result = highpoly_checks.hp_checks_by_ids
+
+            project_data.address = highpoly_checks.address
+
+        if has_lp and has_hp and not preparer.streaming:
+            progress.start_stage("Импорт НПМ для отображения")
+            yield progress
+            preparer.import_lowpoly_models(firstImport=False)
+    except GeneratorExit:
+        # cancelled: blender file was cleared by import, models of partial check are removed
+        if imported:
+            preparer._clear_blender_file()
+        progress.end_stage()
+        logger.add("Проверка отменена")
+        raise
+    progress.end_stage()
 
     if has_lp:
         logger.add(lowpoly_checks.lp_result_report)
     if has_hp:
         logger.add(highpoly_checks.hp_result_report)
 
-    return (lp_result, hp_result, project_data)
+    progress.result = (lp_result, hp_result, project_data)
 
 start_time = 0
+handled_errors_count = 0
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import time
+
+from . import logger
+from . import project_index
+
+
+class StageTiming():
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+class CheckProgress():
+    '''Progress of check steps. Work is measured in bytes of fbx files imported and checked,
+    ETA is calculated by throughput of fbx steps already made'''
+    def __init__(self):
+        self.start_time = time.time()
+        self.stages: list[StageTiming] = []
+        # work of lowpoly and highpoly fbx files: estimated by project folder, then updated by fbx lists
+        self.totals = dict()
+        self.done = 0
+        self._work_time = 0
+        self.current = ""
+        # (lp_result, hp_result, project_data) set by the last step
+        self.result = None
+
+    @property
+    def stage(self):
+        return self.stages[-1] if self.stages else None
+
+    def start_stage(self, name):
+        self.end_stage()
+        self.stages.append(StageTiming(name))
+        self.current = ""
+
+    def end_stage(self):
+        stage = self.stage
+        if stage is not None and stage.end is None:
+            stage.end = time.time()
+            logger.add(f"stage: {stage.name}, {round(stage.duration, 2)} сек.")
+
+    def set_total(self, kind, work):
+        self.totals[kind] = work
+
+    def advance(self, work, seconds, current=""):
+        self.done += work
+        self._work_time += seconds
+        self.current = current
+
+    @property
+    def total(self):
+        return sum(self.totals.values())
+
+    @property
+    def factor(self):
+        if self.total <= 0:
+            return 0.0
+        return min(1.0, self.done / self.total)
+
+    @property
+    def eta(self):
+        '''Seconds left, None until the first fbx step is made'''
+        if self.done <= 0 or self._work_time <= 0:
+            return None
+        return max(0.0, (self.total - self.done) * self._work_time / self.done)
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    @property
+    def text(self):
+        text = self.stage.name if self.stage else ""
+        if self.current:
+            text += f": {self.current}"
+        eta = self.eta
+        if eta is not None:
+            text += f" (осталось ~{format_seconds(eta)})"
+        return text
+
+    @property
+    def timings_text(self):
+        return "\n".join(f"{stage.name} - {format_seconds(stage.duration)}" for stage in self.stages)
+
+def format_seconds(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} сек."
+    return f"{seconds // 60} мин. {seconds % 60} сек."
+
+def fbx_work(fbx):
+    try:
+        return max(os.path.getsize(os.path.join(fbx.root, fbx.file_name)), 1)
+    except OSError:
+        return 1
+
+def estimate_work(index, lowpoly, phases):
+    '''Work of fbx files found in project folder, before fbx list is created. phases - import and check or check only'''
+    return phases * sum(max(file.size, 1) for entry, file in index.iter_files()
+                        if file.name.lower().endswith(".fbx") and project_index.is_lowpoly_name(file.name) == lowpoly)
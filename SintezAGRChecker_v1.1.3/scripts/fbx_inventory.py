@@ -0,0 +1,177 @@
+import os
+import mmap
+import struct
+
+from . import mesh_stats
+
+
+FBX_MAGIC = b"Kaydara FBX Binary  \x00"
+HEADER_SIZE = 27
+# older files have string ids of objects
+MIN_VERSION = 7000
+# node record offsets and counts are 64-bit since FBX 7.5
+LARGE_HEADER_VERSION = 7500
+
+BLENDER_TYPES = {"Mesh": 'MESH', "Light": 'LIGHT', "Camera": 'CAMERA', "Null": 'EMPTY', "Root": 'EMPTY', "LimbNode": 'ARMATURE'}
+SCALAR_FORMATS = {ord('Y'): struct.Struct('<h'), ord('C'): struct.Struct('<?'), ord('I'): struct.Struct('<i'),
+                  ord('F'): struct.Struct('<f'), ord('D'): struct.Struct('<d'), ord('L'): struct.Struct('<q')}
+ARRAY_CODES = b"fdlibc"
+U32 = struct.Struct('<I')
+ARRAY_HEADER = struct.Struct('<III')
+SMALL_NODE_HEADER = struct.Struct('<III')
+LARGE_NODE_HEADER = struct.Struct('<QQQ')
+
+
+class FbxObject():
+    '''Model of fbx file with the same fields as mesh_stats.ObjectStats used by composition checks'''
+    def __init__(self, uid, name, fbx_type):
+        self.uid = uid
+        self.name = name
+        self.name_lower = name.lower()
+        self.fbx_type = fbx_type
+        self.type = BLENDER_TYPES.get(fbx_type, 'OTHER')
+        self.role = mesh_stats.get_role(self.name_lower, self.type)
+        self.parent_uid = None
+        self.parent_name = None
+
+class FbxInventory():
+    '''Objects, animations and cameras of binary fbx file, read without geometry arrays'''
+    def __init__(self, version):
+        self.version = version
+        self.objects: list[FbxObject] = []
+        self.animation_stacks_count = 0
+        # objects with animation curves, blender creates action for each of them
+        self.actions_count = 0
+        self.cameras_count = 0
+        self.geometries_count = 0
+        self.materials_count = 0
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    @property
+    def meshes(self):
+        return [obj for obj in self.objects if obj.type == 'MESH']
+
+def _read_node_header(buf, offset, large):
+    header = LARGE_NODE_HEADER if large else SMALL_NODE_HEADER
+    end, count, props_length = header.unpack_from(buf, offset)
+    offset += header.size
+    name_length = buf[offset]
+    name = bytes(buf[offset + 1:offset + 1 + name_length])
+    return end, count, props_length, name, offset + 1 + name_length
+
+def _iter_nodes(buf, offset, end, large):
+    '''(name, properties offset, properties count, children offset, end offset) of sibling nodes'''
+    while offset < end:
+        node_end, count, props_length, name, props_offset = _read_node_header(buf, offset, large)
+        if node_end == 0:
+            return
+        if node_end <= offset or node_end > len(buf):
+            raise ValueError(f"Broken fbx node {name}")
+        yield name, props_offset, count, props_offset + props_length, node_end
+        offset = node_end
+
+def _read_properties(buf, offset, count):
+    '''Scalar and string properties of node, arrays are skipped and returned as None'''
+    props = []
+    for _ in range(count):
+        code = buf[offset]
+        offset += 1
+        scalar = SCALAR_FORMATS.get(code)
+        if scalar:
+            props.append(scalar.unpack_from(buf, offset)[0])
+            offset += scalar.size
+        elif code in (ord('S'), ord('R')):
+            length = U32.unpack_from(buf, offset)[0]
+            props.append(bytes(buf[offset + 4:offset + 4 + length]))
+            offset += 4 + length
+        elif code in ARRAY_CODES:
+            _, _, length = ARRAY_HEADER.unpack_from(buf, offset)
+            props.append(None)
+            offset += ARRAY_HEADER.size + length
+        else:
+            raise ValueError(f"Unknown fbx property type {chr(code)}")
+    return props
+
+def _object_name(value):
+    '''Name of "Name\\x00\\x01Class" string property'''
+    return value.split(b"\x00\x01")[0].decode('utf-8', errors='replace')
+
+def _parse(buf):
+    if len(buf) < HEADER_SIZE or bytes(buf[:len(FBX_MAGIC)]) != FBX_MAGIC:
+        return None
+    version = U32.unpack_from(buf, 23)[0]
+    if version < MIN_VERSION:
+        return None
+    large = version >= LARGE_HEADER_VERSION
+    inventory = FbxInventory(version)
+
+    models = dict()
+    curve_nodes = set()
+    curves = set()
+    connections = []
+    for name, props_offset, count, children_offset, end in _iter_nodes(buf, HEADER_SIZE, len(buf), large):
+        if name == b"Objects":
+            for obj_name, obj_props_offset, obj_count, _, _ in _iter_nodes(buf, children_offset, end, large):
+                if obj_name not in (b"Model", b"NodeAttribute", b"AnimationStack", b"AnimationCurveNode", b"AnimationCurve", b"Geometry", b"Material"):
+                    continue
+                props = _read_properties(buf, obj_props_offset, min(obj_count, 3))
+                if len(props) < 3 or not isinstance(props[1], bytes) or not isinstance(props[2], bytes):
+                    continue
+                uid = props[0]
+                fbx_class = props[2].decode('utf-8', errors='replace')
+                if obj_name == b"Model":
+                    models[uid] = FbxObject(uid, _object_name(props[1]), fbx_class)
+                elif obj_name == b"NodeAttribute":
+                    if fbx_class == "Camera":
+                        inventory.cameras_count += 1
+                elif obj_name == b"AnimationStack":
+                    inventory.animation_stacks_count += 1
+                elif obj_name == b"AnimationCurveNode":
+                    curve_nodes.add(uid)
+                elif obj_name == b"AnimationCurve":
+                    curves.add(uid)
+                elif obj_name == b"Geometry":
+                    inventory.geometries_count += 1
+                elif obj_name == b"Material":
+                    inventory.materials_count += 1
+        elif name == b"Connections":
+            for _, c_props_offset, c_count, _, _ in _iter_nodes(buf, children_offset, end, large):
+                props = _read_properties(buf, c_props_offset, min(c_count, 3))
+                if len(props) == 3:
+                    connections.append((props[1], props[2]))
+
+    animated_curve_nodes = set()
+    animated_models = set()
+    for child, parent in connections:
+        if child in models and parent in models:
+            models[child].parent_uid = parent
+            models[child].parent_name = models[parent].name
+        elif child in curves and parent in curve_nodes:
+            animated_curve_nodes.add(parent)
+    for child, parent in connections:
+        if child in animated_curve_nodes and parent in models:
+            animated_models.add(parent)
+    inventory.actions_count = len(animated_models)
+
+    for obj in models.values():
+        # blender creates one armature object for each skeleton, bones are not objects
+        if obj.fbx_type == "LimbNode" and obj.parent_uid in models and models[obj.parent_uid].fbx_type == "LimbNode":
+            continue
+        inventory.objects.append(obj)
+    return inventory
+
+def read_inventory(path):
+    '''Inventory of binary fbx file, None for ascii, broken or unreadable files'''
+    try:
+        if os.path.getsize(path) < HEADER_SIZE:
+            return None
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _parse(buf)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
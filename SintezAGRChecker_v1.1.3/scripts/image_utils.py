@@ -0,0 +1,265 @@
+import os
+import struct
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# color types with alpha channel: grayscale + alpha, RGB + alpha
+ALPHA_COLOR_TYPES = (4, 6)
+CHANNELS_BY_COLOR_TYPE = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+# (x start, y start, x step, y step)
+ADAM7_PASSES = ((0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4), (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2))
+READ_SIZE = 65536
+INFLATE_SIZE = 1 << 20
+PLACEHOLDER_SIZE = 256
+TEXTURE_WORKERS = 8
+
+# size is None if file is not a readable png, is_one_color is None if texture is not a placeholder
+TextureResult = namedtuple("TextureResult", ["path", "size", "has_alpha", "is_one_color"])
+
+
+class ImageInfo():
+    def __init__(self, width, height, bit_depth, color_type, interlace):
+        self.width = width
+        self.height = height
+        self.bit_depth = bit_depth
+        self.color_type = color_type
+        self.interlace = interlace
+        self.has_trns = False
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def has_alpha(self):
+        return self.color_type in ALPHA_COLOR_TYPES or self.has_trns
+
+def _read_chunks_before_data(f, info):
+    '''Walk chunk headers between IHDR and the first IDAT without reading chunk data'''
+    while True:
+        header = f.read(8)
+        if len(header) != 8:
+            return
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type in (b"IDAT", b"IEND"):
+            return
+        if chunk_type == b"tRNS":
+            info.has_trns = True
+        f.seek(length + 4, os.SEEK_CUR)
+
+def read_png_header(f):
+    '''Parse PNG signature, IHDR chunk and ancillary chunks before image data from binary file object.
+    Returns None if data is not png'''
+    head = f.read(33)
+    if len(head) != 33 or head[:8] != PNG_SIGNATURE or head[12:16] != b"IHDR":
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', head[16:29])
+    info = ImageInfo(width, height, bit_depth, color_type, interlace)
+    _read_chunks_before_data(f, info)
+    return info
+
+def read_png_info(path):
+    '''Returns None if file is not png'''
+    with open(path, 'rb') as f:
+        return read_png_header(f)
+
+class ImageInfoIndex():
+    '''PNG headers parsed once per file. Entries are valid while file mtime and size are the same'''
+    def __init__(self):
+        self._infos = dict()
+
+    def get(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self._infos.get(path)
+        if entry is None or entry[0] != key:
+            entry = (key, read_png_info(path))
+            self._infos[path] = entry
+        return entry[1]
+
+    def get_size(self, path):
+        info = self.get(path)
+        if info is None:
+            return None
+        return info.size
+
+    def clear(self):
+        self._infos.clear()
+
+image_index = ImageInfoIndex()
+
+def _iter_idat_data(f):
+    '''Compressed image data of all IDAT chunks, read by parts'''
+    f.seek(len(PNG_SIGNATURE))
+    while True:
+        header = f.read(8)
+        if len(header) != 8:
+            return
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type == b"IEND":
+            return
+        if chunk_type != b"IDAT":
+            f.seek(length + 4, os.SEEK_CUR)
+            continue
+        while length > 0:
+            data = f.read(min(length, READ_SIZE))
+            if not data:
+                return
+            length -= len(data)
+            yield data
+        f.seek(4, os.SEEK_CUR)
+
+def _iter_scanlines(f, sizes):
+    '''Inflated scanlines (filter byte + data) of given sizes. Inflated data is kept within INFLATE_SIZE'''
+    sizes = iter(sizes)
+    size = next(sizes, None)
+    decompressor = zlib.decompressobj()
+    buffer = bytearray()
+    for data in _iter_idat_data(f):
+        while data and size is not None:
+            buffer += decompressor.decompress(data, INFLATE_SIZE)
+            data = decompressor.unconsumed_tail
+            pos = 0
+            while size is not None and len(buffer) - pos >= size:
+                yield bytes(buffer[pos:pos + size])
+                pos += size
+                size = next(sizes, None)
+            del buffer[:pos]
+        if size is None:
+            return
+
+def _passes_sizes(info):
+    '''Width and height of every non empty pass (one pass for not interlaced image)'''
+    passes = ADAM7_PASSES if info.interlace else ((0, 0, 1, 1),)
+    result = []
+    for x0, y0, dx, dy in passes:
+        width = (info.width - x0 + dx - 1) // dx
+        height = (info.height - y0 + dy - 1) // dy
+        if width > 0 and height > 0:
+            result.append((width, height))
+    return result
+
+def _shift(line, bpp):
+    return np.concatenate((np.zeros(bpp, dtype=np.int16), line[:-bpp].astype(np.int16)))[:len(line)]
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa = np.abs(p - a)
+    pb = np.abs(p - b)
+    pc = np.abs(p - c)
+    return np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+def _filter_scanline(filter_type, line, prev, bpp):
+    '''Filtered bytes of reconstructed scanline for Average and Paeth filters'''
+    a = _shift(line, bpp)
+    b = prev.astype(np.int16)
+    if filter_type == 3:
+        predictor = (a + b) >> 1
+    else:
+        predictor = _paeth(a, b, _shift(prev, bpp))
+    return ((line.astype(np.int16) - predictor) & 0xFF).astype(np.uint8)
+
+def _unfilter_scanline(filter_type, raw, prev, bpp):
+    if filter_type == 0:
+        return raw
+    if filter_type == 1:
+        return np.cumsum(raw.reshape(-1, bpp), axis=0, dtype=np.uint8).ravel()
+    if filter_type == 2:
+        return raw + prev
+    if filter_type not in (3, 4):
+        raise ValueError(f"Unknown png filter type {filter_type}")
+
+    line = bytearray(raw.tobytes())
+    up = prev.tolist()
+    for i in range(len(line)):
+        a = line[i - bpp] if i >= bpp else 0
+        if filter_type == 3:
+            line[i] = (line[i] + ((a + up[i]) >> 1)) & 0xFF
+        else:
+            c = up[i - bpp] if i >= bpp else 0
+            p = a + up[i] - c
+            pa, pb, pc = abs(p - a), abs(p - up[i]), abs(p - c)
+            predictor = a if pa <= pb and pa <= pc else (up[i] if pb <= pc else c)
+            line[i] = (line[i] + predictor) & 0xFF
+    return np.frombuffer(bytes(line), dtype=np.uint8)
+
+def _scanline_samples(line, width, channels, bit_depth):
+    if bit_depth == 8:
+        return line
+    if bit_depth == 16:
+        return np.frombuffer(line.tobytes(), dtype='>u2')
+    bits = np.unpackbits(line)[:width * channels * bit_depth].reshape(-1, bit_depth)
+    return bits.dot(1 << np.arange(bit_depth - 1, -1, -1))
+
+def is_one_color_png(path):
+    '''All pixels of png have the same colour (channels compared with 3 decimals precision).
+    Image data is inflated by parts and reading stops at the first differing scanline'''
+    info = image_index.get(path)
+    if info is None or info.color_type not in CHANNELS_BY_COLOR_TYPE:
+        return False
+    channels = CHANNELS_BY_COLOR_TYPE[info.color_type]
+    bits_per_pixel = channels * info.bit_depth
+    bpp = max(1, bits_per_pixel // 8)
+    max_value = (1 << info.bit_depth) - 1
+
+    passes = _passes_sizes(info)
+    sizes = [(width * bits_per_pixel + 7) // 8 + 1 for width, height in passes for _ in range(height)]
+    reference = None
+    with open(path, 'rb') as f:
+        scanlines = _iter_scanlines(f, sizes)
+        for width, height in passes:
+            prev = np.zeros((width * bits_per_pixel + 7) // 8, dtype=np.uint8)
+            # once a scanline of the pass is verified, the next ones must be equal to it
+            expected = None
+            for _ in range(height):
+                scanline = next(scanlines, None)
+                if scanline is None:
+                    return False
+                filter_type = scanline[0]
+                raw = np.frombuffer(scanline, dtype=np.uint8, offset=1)
+                if expected is not None:
+                    if filter_type in (3, 4):
+                        if np.array_equal(_filter_scanline(filter_type, expected, prev, bpp), raw):
+                            prev = expected
+                            continue
+                    elif np.array_equal(_unfilter_scanline(filter_type, raw, prev, bpp), expected):
+                        prev = expected
+                        continue
+
+                line = _unfilter_scanline(filter_type, raw, prev, bpp)
+                samples = _scanline_samples(line, width, channels, info.bit_depth)
+                pixels = np.round(samples / max_value, 3).reshape(-1, channels)
+                if reference is None:
+                    reference = pixels[0].copy()
+                if not np.all(pixels == reference):
+                    return False
+                expected = line
+                prev = line
+    return True
+
+def validate_texture(path):
+    '''Header, alpha and (for placeholders) solid colour result of one texture'''
+    try:
+        info = image_index.get(path)
+        if info is None:
+            return TextureResult(path, None, False, None)
+        is_one_color = is_one_color_png(path) if info.width == PLACEHOLDER_SIZE else None
+        return TextureResult(path, info.size, info.has_alpha, is_one_color)
+    except (OSError, ValueError, zlib.error):
+        return TextureResult(path, None, False, None)
+
+def validate_textures(paths, max_workers=TEXTURE_WORKERS):
+    '''Texture results by path. Files are read and decoded in parallel threads'''
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return dict()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return dict(zip(paths, executor.map(validate_texture, paths)))
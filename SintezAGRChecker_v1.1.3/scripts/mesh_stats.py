@@ -0,0 +1,69 @@
+from . import mesh_utils
+
+
+def get_role(name_lower, obj_type):
+    if obj_type == 'LIGHT':
+        return "light"
+    if obj_type == 'EMPTY':
+        return "root"
+    if obj_type != 'MESH':
+        return "other"
+    if "ucx" in name_lower:
+        return "ucx"
+    if "glass" in name_lower:
+        return "glass"
+    if "main" in name_lower:
+        return "main"
+    if "ground" in name_lower:
+        return "ground"
+    return "other"
+
+class ObjectStats():
+    '''Compact record of object data used by checks, collected with one pass over RNA'''
+    def __init__(self, obj):
+        self.obj = obj
+        self.name = obj.name
+        self.name_lower = self.name.lower()
+        self.type = obj.type
+        self.role = get_role(self.name_lower, self.type)
+        self.parent_name = obj.parent.name if obj.parent else None
+
+        self.location = tuple(obj.location)
+        self.rotation = tuple(obj.rotation_euler)
+        self.scale = tuple(obj.scale)
+        self.dimensions = tuple(obj.dimensions)
+        bound_box = [tuple(corner) for corner in obj.bound_box]
+        self.bounds_min = tuple(min(corner[i] for corner in bound_box) for i in range(3))
+        self.bounds_max = tuple(max(corner[i] for corner in bound_box) for i in range(3))
+        self.bounds_center = tuple(sum(corner[i] for corner in bound_box) / 8 for i in range(3))
+
+        self.polycount = 0
+        self.nontris_count = 0
+        self.uv_layers_count = 0
+        self.materials = []
+        self.color_attributes_count = 0
+        if self.type == 'MESH':
+            me = obj.data
+            self.polycount, self.nontris_count = mesh_utils.get_polycount(obj)
+            self.uv_layers_count = len(me.uv_layers)
+            self.materials = list(me.materials)
+            self.color_attributes_count = len(me.color_attributes)
+
+    @property
+    def materials_count(self):
+        return len(self.materials)
+
+class MeshStats():
+    def __init__(self, objects):
+        self.records = [ObjectStats(obj) for obj in objects]
+        self.by_name = {record.name: record for record in self.records}
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def meshes(self):
+        return [record for record in self.records if record.type == 'MESH']
@@ -0,0 +1,210 @@
+import itertools
+
+import numpy as np
+
+
+def get_loop_totals(mesh):
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    return loop_totals
+
+def get_polycount(obj):
+    '''Polygons count and non triangle polygons count of mesh object (one bulk read)'''
+    loop_totals = get_loop_totals(obj.data)
+    return len(loop_totals), int(np.count_nonzero(loop_totals > 3))
+
+def fan_triangulate(loop_starts, loop_totals):
+    '''Loop indices of fan triangles (triangles, 3) and polygon index for every triangle'''
+    tris_per_poly = np.maximum(loop_totals - 2, 0)
+    tri_polys = np.repeat(np.arange(len(loop_totals)), tris_per_poly)
+    first_tris = np.cumsum(tris_per_poly) - tris_per_poly
+    offsets = np.arange(len(tri_polys)) - first_tris[tri_polys]
+    starts = loop_starts[tri_polys]
+    tri_loops = np.stack((starts, starts + offsets + 1, starts + offsets + 2), axis=1)
+    return tri_loops, tri_polys
+
+def select_polygons(obj, indices):
+    '''Select only polygons with indices and enter face select edit mode'''
+    import bpy
+    me = obj.data
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    polygons_select = np.zeros(len(me.polygons), dtype=bool)
+    polygons_select[np.asarray(indices, dtype=np.int64)] = True
+
+    loop_polygons = np.repeat(np.arange(len(me.polygons)), get_loop_totals(me))
+    selected_loops = polygons_select[loop_polygons]
+    loop_vertices = np.empty(len(me.loops), dtype=np.int32)
+    me.loops.foreach_get("vertex_index", loop_vertices)
+    loop_edges = np.empty(len(me.loops), dtype=np.int32)
+    me.loops.foreach_get("edge_index", loop_edges)
+
+    vertices_select = np.zeros(len(me.vertices), dtype=bool)
+    vertices_select[loop_vertices[selected_loops]] = True
+    edges_select = np.zeros(len(me.edges), dtype=bool)
+    edges_select[loop_edges[selected_loops]] = True
+
+    me.vertices.foreach_set("select", vertices_select)
+    me.edges.foreach_set("select", edges_select)
+    me.polygons.foreach_set("select", polygons_select)
+    me.update()
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    bpy.ops.mesh.select_mode(type="FACE")
+
+def get_vertices_co(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+def get_loop_vertices(mesh):
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    return loop_vertices
+
+def get_active_uv(mesh):
+    '''UV coordinates (loops, 2) of active uv layer, None if mesh has no uv layers'''
+    uv_layer = mesh.uv_layers.active
+    if uv_layer is None:
+        return None
+    uv = np.empty(len(mesh.loops) * 2, dtype=np.float64)
+    uv_layer.data.foreach_get("uv", uv)
+    return uv.reshape(-1, 2)
+
+def get_loop_starts(mesh):
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    return loop_starts
+
+def get_uv_signed_areas(mesh):
+    '''Doubled signed uv area of every polygon (shoelace formula), None if mesh has no uv layers'''
+    uv = get_active_uv(mesh)
+    if uv is None:
+        return None
+    loop_starts = get_loop_starts(mesh)
+    if len(loop_starts) == 0:
+        return np.empty(0, dtype=np.float64)
+    loop_totals = get_loop_totals(mesh)
+    next_loops = np.arange(1, len(uv) + 1)
+    next_loops[loop_starts + loop_totals - 1] = loop_starts
+    cross = uv[:, 0] * uv[next_loops, 1] - uv[:, 1] * uv[next_loops, 0]
+    return np.add.reduceat(cross, loop_starts)
+
+def get_flipped_polygons(mesh):
+    '''Indices of polygons with clock-wise (mirrored) uv'''
+    areas = get_uv_signed_areas(mesh)
+    if areas is None:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(areas < 0)
+
+def is_mesh_convex(mesh, tolerance, max_chunk_items=4000000):
+    '''Every vertex (except vertices of the polygon itself) farther than tolerance from the plane
+    of a polygon (plane by first three vertices) must be on the same side of this plane'''
+    co = get_vertices_co(mesh)
+    loop_vertices = get_loop_vertices(mesh)
+    loop_starts = get_loop_starts(mesh)
+    loop_totals = get_loop_totals(mesh)
+    if len(co) == 0 or len(loop_starts) == 0:
+        return True
+
+    t1 = co[loop_vertices[loop_starts]]
+    t2 = co[loop_vertices[loop_starts + 1]]
+    t3 = co[loop_vertices[loop_starts + 2]]
+    normals = np.cross(t2 - t1, t3 - t1)
+    d = -np.einsum("ij,ij->i", normals, t1)
+    lengths = np.sqrt(np.einsum("ij,ij->i", normals, normals))
+
+    planes = np.flatnonzero(lengths > 0)
+    loop_polygons = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    chunk_size = max(1, max_chunk_items // len(co))
+    for chunk_start in range(0, len(planes), chunk_size):
+        chunk = planes[chunk_start:chunk_start + chunk_size]
+        values = normals[chunk] @ co.T + d[chunk, None]
+        significant = np.abs(values / lengths[chunk, None]) >= tolerance
+
+        chunk_rows = np.full(len(loop_starts), -1, dtype=np.int64)
+        chunk_rows[chunk] = np.arange(len(chunk))
+        own_loops = chunk_rows[loop_polygons] >= 0
+        significant[chunk_rows[loop_polygons[own_loops]], loop_vertices[own_loops]] = False
+
+        first = np.argmax(significant, axis=1)
+        prev = values[np.arange(len(chunk)), first]
+        if np.any(significant & (values * prev[:, None] < -0.001)):
+            return False
+    return True
+
+def get_edges_faces_count(mesh):
+    '''Count of polygons using every edge'''
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    return np.bincount(loop_edges, minlength=len(mesh.edges))
+
+def get_manifold_errors(mesh):
+    '''Count of boundary edges (one polygon), non manifold edges (no polygons or more than two)
+    and loose vertices (not used by any polygon)'''
+    faces_count = get_edges_faces_count(mesh)
+    boundary_count = int(np.count_nonzero(faces_count == 1))
+    non_manifold_count = int(np.count_nonzero((faces_count == 0) | (faces_count > 2)))
+    loops_count = np.bincount(get_loop_vertices(mesh), minlength=len(mesh.vertices))
+    loose_count = int(np.count_nonzero(loops_count == 0))
+    return boundary_count, non_manifold_count, loose_count
+
+def get_world_co(obj):
+    co = get_vertices_co(obj.data)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    return co @ matrix[:3, :3].T + matrix[:3, 3]
+
+def get_polygons_vertices(mesh):
+    loop_vertices = get_loop_vertices(mesh)
+    loop_starts = get_loop_starts(mesh)
+    return [poly.tolist() for poly in np.split(loop_vertices, loop_starts[1:])]
+
+def sweep_and_prune(bounds_min, bounds_max):
+    '''Sorted index pairs (i, j), i < j, of intersecting axis aligned boxes'''
+    pairs = []
+    active = np.empty(0, dtype=np.int64)
+    for i in np.argsort(bounds_min[:, 0], kind="stable").tolist():
+        active = active[bounds_max[active, 0] >= bounds_min[i, 0]]
+        overlap = np.all(bounds_min[active, 1:] <= bounds_max[i, 1:], axis=1) & np.all(bounds_min[i, 1:] <= bounds_max[active, 1:], axis=1)
+        for j in active[overlap].tolist():
+            pairs.append((min(i, j), max(i, j)))
+        active = np.append(active, i)
+    return sorted(pairs)
+
+def _grid_keys(cells):
+    cells = cells - cells.min(axis=0)
+    dims = cells.max(axis=0) + 1
+    if np.prod(dims.astype(np.float64)) < 2 ** 62:
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    return np.unique(cells, axis=0, return_inverse=True)[1].ravel()
+
+def get_close_vertices_mask(co, dist):
+    '''Vertices that may have another vertex closer than dist.
+    Two points closer than dist share a cell (size 2*dist) in at least one of 8 grids shifted by dist'''
+    mask = np.zeros(len(co), dtype=bool)
+    cell_size = dist * 2
+    for shift in itertools.product((0.0, dist), repeat=3):
+        cells = np.floor((co + np.array(shift)) / cell_size).astype(np.int64)
+        _, inverse, counts = np.unique(_grid_keys(cells), return_inverse=True, return_counts=True)
+        mask |= counts[inverse.ravel()] > 1
+    return mask
+
+def count_doubles(mesh, dist):
+    '''Count of vertices merged by bmesh.ops.find_doubles with the same distance.
+    find_doubles runs on a temporary bmesh of candidate vertices only (in index order),
+    other vertices have no vertex closer than dist and are never merged. Edit mode is not needed'''
+    import bmesh
+    co = get_vertices_co(mesh)
+    if len(co) < 2:
+        return 0
+    candidates = np.flatnonzero(get_close_vertices_mask(co, dist))
+    if len(candidates) < 2:
+        return 0
+
+    bm = bmesh.new()
+    try:
+        verts = [bm.verts.new(point) for point in co[candidates].tolist()]
+        result = bmesh.ops.find_doubles(bm, verts=verts, keep_verts=[], dist=dist)
+        return len(result["targetmap"])
+    finally:
+        bm.free()
@@ -12,6 +12,12 @@ from . import properties
 from . import check_report
 from . import logger
 from . import view_tools
+from . import project_index
+from . import check_progress
+
+
+# seconds between modal steps of checks, UI is redrawn between them
+CHECK_STEP_INTERVAL = 0.05
 
 
 class ShowChecklist(Operator):
@@ -553,7 +559,7 @@ class ImportModelsButton(Operator):
 
     @classmethod
     def poll(cls, context):
-        return os_utils.check_models_path()
+        return os_utils.check_models_path() and not context.window_manager.agr_check_run.running
 
     def execute(self, context):
         if os_utils.check_models_path(self):
@@ -570,6 +576,10 @@ class ClearBlenderFileButton(Operator):
     # def poll(cls, context):
     #     return os_utils.check_models_path()
 
+    @classmethod
+    def poll(cls, context):
+        return not context.window_manager.agr_check_run.running
+
     def execute(self, context):
         check_highpoly_lowpoly.clear_blender_file()
         return {'FINISHED'}
@@ -579,9 +589,13 @@ class RunCalculate_all(Operator):
     bl_label = "Check AGR zip-files (clean blender file)"
     bl_description = "ОСТОРОЖНО! Запуск проверок очищает текущий бленрер файл и импортирует модели из указанного пути. После выполнения проверок заполняет чеклист и фиксирует ошибки. Для ВПМ корректирует координаты и материалы в соответствии с geojson."
 
+    _timer = None
+    _steps = None
+    _progress = None
+
     @classmethod
     def poll(cls, context):
-        return os_utils.check_models_path()
+        return os_utils.check_models_path() and not context.window_manager.agr_check_run.running
 
     def execute(self, context):
         if os_utils.check_models_path(self):
@@ -589,6 +603,74 @@ class RunCalculate_all(Operator):
             bpy.ops.view3d.view_selected()
         return {'FINISHED'}
 
+    def invoke(self, context, event):
+        if not os_utils.check_models_path(self):
+            return {'CANCELLED'}
+        self._progress = check_progress.CheckProgress()
+        self._steps = utills.iter_calculate_all_checks(self, self._progress)
+        context.window_manager.agr_check_run.cancel_requested = False
+        utills.update_check_run(context.window_manager, self._progress)
+        self._timer = context.window_manager.event_timer_add(CHECK_STEP_INTERVAL, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if context.window_manager.agr_check_run.cancel_requested or (event.type == 'ESC' and event.value == 'PRESS'):
+            self._steps.close()
+            self._finish(context)
+            self.report({'WARNING'}, "Проверка отменена")
+            return {'CANCELLED'}
+        if event.type != 'TIMER' or event.timer != self._timer:
+            return {'PASS_THROUGH'}
+        try:
+            next(self._steps)
+        except StopIteration:
+            self._finish(context)
+            self.report({'INFO'}, f"Проверка завершена за {check_progress.format_seconds(self._progress.elapsed)}")
+            if context.area and context.area.type == 'VIEW_3D':
+                bpy.ops.view3d.view_selected()
+            return {'FINISHED'}
+        except Exception as e:
+            self._finish(context)
+            logger.add_error(e, msg="Непредвиденная ошибка во время проверки!")
+            self.report({'ERROR'}, f"Проверка прервана ошибкой ({e})")
+            return {'CANCELLED'}
+        utills.update_check_run(context.window_manager, self._progress)
+        return {'RUNNING_MODAL'}
+
+    def _finish(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        self._timer = None
+        self._steps = None
+        utills.update_check_run(context.window_manager)
+
+class CancelCalculate_all(Operator):
+    bl_idname = "agr.cancel_calculate_all"
+    bl_label = "Cancel AGR check"
+    bl_description = "Останавливает проверку. Загруженные проверкой модели удаляются, чеклист не изменяется"
+
+    @classmethod
+    def poll(cls, context):
+        return context.window_manager.agr_check_run.running
+
+    def execute(self, context):
+        context.window_manager.agr_check_run.cancel_requested = True
+        return {'FINISHED'}
+
+class RunPreflight(Operator):
+    bl_idname = "agr.run_preflight"
+    bl_label = "Preflight AGR zip-files"
+    bl_description = "Быстрая проверка архивов без распаковки и импорта: размер архивов, форматы, наименования файлов, разрешение и альфа-канал текстур. Blender файл не изменяется"
+
+    @classmethod
+    def poll(cls, context):
+        return os_utils.check_models_path() and not context.window_manager.agr_check_run.running
+
+    def execute(self, context):
+        if os_utils.check_models_path(self):
+            utills.calculate_preflight_checks(context)
+        return {'FINISHED'}
+
 class RunCalculate_all_collections(Operator):
     bl_idname = "agr.run_calculate_all_collections"
     bl_label = "Check AGR by collections"
@@ -596,7 +678,7 @@ class RunCalculate_all_collections(Operator):
 
     @classmethod
     def poll(cls, context):
-        return os_utils.check_models_path()
+        return os_utils.check_models_path() and not context.window_manager.agr_check_run.running
 
     def execute(self, context):
         if os_utils.check_models_path(self):
@@ -640,15 +722,16 @@ class CheckGeojson(Operator):
         #         categories[row["category"]] = []
         #     categories[row["category"]].append(row)
 
+        index = project_index.ProjectIndex(os_utils._get_project_path())
         adress = ""
-        for root, dirs, files in os.walk(os_utils._get_project_path()):
+        for root, dirs, files in index.walk():
             for file in files:
                 if file.endswith(".geojson"):
                     if "ground" in file.lower() and "light" not in file.lower():
                         adress = file.replace("_Ground", "").replace("SM_", "").replace(".geojson", "")
         
         jsons = dict()
-        for root, dirs, files in os.walk(os_utils._get_project_path()):
+        for root, dirs, files in index.walk():
             for file in files:
                 if file.endswith(".geojson"):
                     json_data = check_highpoly_lowpoly.ModelPreparer._get_json_data(os.path.join(root, file))
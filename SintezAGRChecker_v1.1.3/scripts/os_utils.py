@@ -31,6 +31,9 @@ def get_addon_root_dir():
         if mod.bl_info.get("name") == "SINTEZ AGR Checker":
             path = mod.__file__.replace("__init__.py", "")
             break
+    if not path:
+        # addon is not installed, e.g. loaded by cli.py
+        path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     return path
 
 def get_documents_dir():
@@ -0,0 +1,98 @@
+import os
+from collections import namedtuple
+
+
+FileEntry = namedtuple("FileEntry", ["name", "size", "mtime_ns"])
+
+
+def is_lowpoly_name(name):
+    return name[:4].isdigit()
+
+def is_highpoly_name(name):
+    return name.startswith("SM_")
+
+class DirEntry():
+    def __init__(self, path):
+        self.path = path
+        self.dirs = []
+        self.files: list[FileEntry] = []
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def file_names(self):
+        return [file.name for file in self.files]
+
+class ProjectIndex():
+    '''Directories and files of project folder collected by one os.scandir traversal.
+    Stages read the tree from the index instead of walking the folder again'''
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.dirs: dict[str, DirEntry] = dict()
+        self.refresh()
+
+    def refresh(self):
+        '''Scan project folder again (after archives extraction)'''
+        self.dirs = dict()
+        if self.root_path and os.path.isdir(self.root_path):
+            self._scan(self.root_path)
+
+    def _scan(self, path):
+        entry = DirEntry(path)
+        self.dirs[path] = entry
+        subdirs = []
+        try:
+            with os.scandir(path) as items:
+                for item in items:
+                    try:
+                        if item.is_dir():
+                            entry.dirs.append(item.name)
+                            if not item.is_symlink():
+                                subdirs.append(item.path)
+                        elif item.is_file():
+                            stat = item.stat()
+                            entry.files.append(FileEntry(item.name, stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        for subdir in subdirs:
+            self._scan(subdir)
+
+    def walk(self):
+        '''Same (root, dirs, files) tuples as os.walk of project folder'''
+        for entry in list(self.dirs.values()):
+            yield entry.path, list(entry.dirs), entry.file_names
+
+    def get_dir(self, path):
+        return self.dirs.get(path)
+
+    def iter_files(self):
+        '''(DirEntry, FileEntry) of every file'''
+        for entry in self.dirs.values():
+            for file in entry.files:
+                yield entry, file
+
+    def fbx_files(self, lowpoly):
+        '''(root, file name) of lowpoly or highpoly fbx files'''
+        return [(entry.path, file.name) for entry, file in self.iter_files()
+                if file.name.lower().endswith(".fbx") and is_lowpoly_name(file.name) == lowpoly]
+
+    def has_lp_hp(self):
+        has_lp = False
+        has_hp = False
+        for entry, file in self.iter_files():
+            has_lp = has_lp or is_lowpoly_name(file.name)
+            has_hp = has_hp or is_highpoly_name(file.name)
+            if has_lp and has_hp:
+                break
+        return has_lp, has_hp
+
+    @property
+    def zip_names(self):
+        root = self.dirs.get(self.root_path)
+        if root is None:
+            return []
+        return [file.name for file in root.files if file.name.endswith(".zip")]
@@ -97,6 +97,14 @@ class ChecklistProperties(PropertyGroup):
     progress_manual: FloatProperty()
     progress_manual_text: StringProperty()
 
+class CheckRunProperties(PropertyGroup):
+    '''State of running checks. Stored in window manager, so it is not saved to blend file'''
+    running: BoolProperty()
+    cancel_requested: BoolProperty()
+    progress: FloatProperty(min=0.0, max=1.0)
+    progress_text: StringProperty()
+    stage_timings: StringProperty()
+
 class AGRCheckerProperties(PropertyGroup):
     def change_path(self, context):
         scene_props = bpy.context.scene.agr_scene_properties
@@ -257,6 +265,9 @@ class AGRCheckerProperties(PropertyGroup):
     show_req_nums: BoolProperty(default=True)
 
     experimental_checks: BoolProperty(default=False, description="Включить в расчет экспериментальные проверки")
+    streaming_checks: BoolProperty(default=False, description="Импортировать, проверять и удалять fbx-файлы по одному. Снижает расход памяти на больших проектах, модели не остаются в сцене")
+    use_results_cache: BoolProperty(default=False, description="Не импортировать и не проверять повторно fbx-файлы, которые не изменились с прошлого расчета")
+    worker_processes: IntProperty(default=0, min=0, max=32, description="Количество фоновых процессов Blender для параллельной проверки fbx-файлов. Файлы, которые не проверил фоновый процесс, проверяются поочередно. 0 - проверка в текущем процессе")
 
     geojson_ZU_area: StringProperty()
     geojson_h_relief: StringProperty()
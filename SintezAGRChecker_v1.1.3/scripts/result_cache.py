@@ -0,0 +1,78 @@
+import os
+import re
+import json
+import hashlib
+
+from . import os_utils
+
+
+CACHE_DIR_NAME = "results_cache"
+# increase when checks are changed without changing addon version
+CACHE_FORMAT = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_checker_version():
+    manifest_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "blender_manifest.toml")
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            match = re.search(r'^version\s*=\s*"([^"]+)"', f.read(), re.MULTILINE)
+    except OSError:
+        return ""
+    return match.group(1) if match else ""
+
+def _update_with_file(hasher, path):
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+
+class ResultCache():
+    '''Persistent checks results of fbx files in AGRChecker_data.
+    Key is a hash of fbx content, files listing of its folder, geojson content, project context and checker version'''
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.cache_dir = os.path.join(root_path, os_utils.CHECKLIST_DATA_FOLDER_NAME, CACHE_DIR_NAME)
+        self.version = f"{CACHE_FORMAT}|{get_checker_version()}"
+
+    def fbx_key(self, fbx_path, context="", files=None):
+        '''context - project data used by fbx checks (address, names of other fbx files).
+        files - (name, size, mtime_ns) of fbx folder files, folder is scanned if not passed'''
+        hasher = hashlib.sha256()
+        hasher.update(f"{self.version}|{context}\n".encode('utf-8'))
+        _update_with_file(hasher, fbx_path)
+        folder = os.path.dirname(fbx_path)
+        if files is None:
+            with os.scandir(folder) as entries:
+                files = [(entry.name, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in entries if entry.is_file()]
+        for name, size, mtime in sorted(files):
+            hasher.update(f"{name}|{size}|{mtime}\n".encode('utf-8'))
+            if name.endswith(".geojson"):
+                _update_with_file(hasher, os.path.join(folder, name))
+        return hasher.hexdigest()
+
+    def _entry_path(self, fbx_path):
+        rel_path = os.path.relpath(fbx_path, self.root_path)
+        path_hash = hashlib.sha1(rel_path.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(self.cache_dir, f"{os.path.basename(fbx_path)}_{path_hash}.json")
+
+    def get(self, fbx_path, key):
+        '''Serialized checks of fbx, None if there is no entry for this key'''
+        try:
+            with open(self._entry_path(fbx_path), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key:
+            return None
+        return entry.get("checks")
+
+    def put(self, fbx_path, key, checks_data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._entry_path(fbx_path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": key, "checks": checks_data}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
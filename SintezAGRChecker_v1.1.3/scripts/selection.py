@@ -7,6 +7,7 @@ from bpy.props import StringProperty, PointerProperty, IntProperty, FloatPropert
 
 from .utills import create_udim_sets, _td_errors
 from . import logger
+from . import mesh_utils
 
 class TDValuesSetOperator(Operator):
     bl_idname = "agr.td_values_set"
@@ -53,17 +54,7 @@ class SelectTexelLessOperator(Operator):
         # logger.add(f"out_udim_errors count = {len(out_udim_face_indices)}")
         logger.add(f"err_faces count = {len(td_less_indices)}")
 
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action = 'DESELECT')
-        bpy.ops.mesh.select_mode(type="FACE")
-        me = obj.data
-        bm = bmesh.from_edit_mesh(me)
-        bm.faces.ensure_lookup_table()
-        for i in td_less_indices:
-            # obj.data.polygons[i].select = True
-            bm.faces[i].select = True
-
-        bmesh.update_edit_mesh(me)
+        mesh_utils.select_polygons(obj, td_less_indices)
 
         # for root, dirs, files in os.walk(bpy.path.abspath("//")):
         #     if os.path.basename(root) == name:
@@ -120,17 +111,7 @@ class SelectTexelGreaterOperator(Operator):
         # logger.add(f"out_udim_errors count = {len(out_udim_face_indices)}")
         logger.add(f"err_faces count = {len(td_greater_indices)}")
 
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action = 'DESELECT')
-        bpy.ops.mesh.select_mode(type="FACE")
-        me = obj.data
-        bm = bmesh.from_edit_mesh(me)
-        bm.faces.ensure_lookup_table()
-        for i in td_greater_indices:
-            # obj.data.polygons[i].select = True
-            bm.faces[i].select = True
-
-        bmesh.update_edit_mesh(me)
+        mesh_utils.select_polygons(obj, td_greater_indices)
 
         # for root, dirs, files in os.walk(bpy.path.abspath("//")):
         #     if os.path.basename(root) == name:
@@ -161,6 +142,30 @@ class SelectTexelGreaterOperator(Operator):
     def invoke(self, context, event):
         return self.execute(context)
 
+class SelectFlippedOperator(Operator):
+    bl_idname = "agr.select_flipped"
+    bl_label = "select_flipped"
+    bl_description = "Показать полигоны у выбранного обьекта с зеркальной UV-разверткой"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        ob = context.active_object
+        return(ob and ob.type == 'MESH')
+
+    def execute(self, context):
+        obj = bpy.context.active_object
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+        flipped_indices = mesh_utils.get_flipped_polygons(obj.data)
+        logger.add(f"flipped faces count = {len(flipped_indices)}")
+
+        mesh_utils.select_polygons(obj, flipped_indices)
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
 class SelectUdimOutOperator(Operator):
     bl_idname = "agr.select_out_udim"
     bl_label = "select_out_udim"
@@ -0,0 +1,230 @@
+import zlib
+from collections import OrderedDict
+
+import bpy
+import numpy as np
+
+from . import mesh_utils
+
+
+# triangles arrays of big meshes take hundreds of megabytes, only last used meshes are kept
+MAX_CACHED_MESHES = 4
+
+# (mesh pointer, object scale) -> _CacheEntry, least recently used first
+_cache = OrderedDict()
+
+
+class MeshTriangles():
+    def __init__(self):
+        self.poly_indices = None  # polygon index for every triangle
+        self.uv = None            # (triangles, 3, 2) uv coordinates of triangle corners
+        self.uv_area = None
+        self.area = None
+        self.normal_z = None      # z of polygon normal for every triangle
+        self.fingerprint = None   # crc of mesh data triangles were read from
+
+    def __len__(self):
+        return len(self.poly_indices)
+
+class _CacheEntry():
+    def __init__(self, mesh, triangles):
+        # pointer of removed mesh can be reused by new mesh
+        self.mesh_uid = mesh.session_uid
+        self.mesh_name = mesh.name
+        self.triangles = triangles
+        self.results = dict()
+        # mesh geometry was updated after triangles were read
+        self.dirty = False
+
+def uv_to_udim_numbers(uv):
+    return (1000 + np.floor(uv[..., 1]) * 10 + np.ceil(uv[..., 0])).astype(np.int64)
+
+def read_mesh_triangles(obj):
+    '''Virtual fan triangulation of mesh with object scale applied. Mesh data is not changed.
+    Returns None if mesh has no active uv layer'''
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+    me = obj.data
+    uv_layer = me.uv_layers.active
+    if uv_layer is None:
+        return None
+
+    loops_count = len(me.loops)
+    polygons_count = len(me.polygons)
+
+    co = np.empty(len(me.vertices) * 3, dtype=np.float64)
+    me.vertices.foreach_get("co", co)
+    scaled_co = co.reshape(-1, 3) * np.array(obj.scale, dtype=np.float64)
+
+    vertex_indices = np.empty(loops_count, dtype=np.int32)
+    me.loops.foreach_get("vertex_index", vertex_indices)
+
+    uv = np.empty(loops_count * 2, dtype=np.float64)
+    uv_layer.data.foreach_get("uv", uv)
+    uv = uv.reshape(-1, 2)
+
+    loop_starts = np.empty(polygons_count, dtype=np.int32)
+    me.polygons.foreach_get("loop_start", loop_starts)
+    loop_totals = mesh_utils.get_loop_totals(me)
+
+    normals = np.empty(polygons_count * 3, dtype=np.float64)
+    me.polygons.foreach_get("normal", normals)
+    fingerprint = _fingerprint(polygons_count, co, vertex_indices, uv)
+
+    tri_loops, tri_polys = mesh_utils.fan_triangulate(loop_starts, loop_totals)
+
+    triangles = MeshTriangles()
+    triangles.fingerprint = fingerprint
+    triangles.poly_indices = tri_polys
+    triangles.uv = uv[tri_loops]
+    triangles.normal_z = normals.reshape(-1, 3)[tri_polys, 2]
+
+    uv_edges_1 = triangles.uv[:, 1] - triangles.uv[:, 0]
+    uv_edges_2 = triangles.uv[:, 2] - triangles.uv[:, 0]
+    triangles.uv_area = 0.5 * np.abs(uv_edges_1[:, 0] * uv_edges_2[:, 1] - uv_edges_1[:, 1] * uv_edges_2[:, 0])
+
+    points = scaled_co[vertex_indices[tri_loops]]
+    cross = np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0])
+    triangles.area = 0.5 * np.sqrt(np.einsum("ij,ij->i", cross, cross))
+    return triangles
+
+def triangles_udims(triangles):
+    '''UDIM number for every triangle (0 if triangle crosses tiles) and set of all used UDIM numbers'''
+    corner_udims = uv_to_udim_numbers(triangles.uv)
+    udims = corner_udims[:, 0].copy()
+    udims[(corner_udims[:, 1] != udims) | (corner_udims[:, 2] != udims)] = 0
+    return udims, set(np.unique(corner_udims).tolist())
+
+def resolutions_by_udims(udims, udim_resolutions):
+    '''Texture size for every triangle, 0 where UDIM has no texture'''
+    items = sorted((k, v) for k, v in udim_resolutions.items() if v)
+    resolutions = np.zeros(len(udims), dtype=np.float64)
+    if not items:
+        return resolutions
+    keys = np.array([k for k, _ in items], dtype=np.int64)
+    values = np.array([v for _, v in items], dtype=np.float64)
+    pos = np.clip(np.searchsorted(keys, udims), 0, len(keys) - 1)
+    found = keys[pos] == udims
+    resolutions[found] = values[pos[found]]
+    return resolutions
+
+def calculate_texel_density(triangles, resolutions, scale_length):
+    '''Texel density (px/m) for every triangle'''
+    td = np.full(len(triangles), 0.01, dtype=np.float64)
+    valid = (triangles.uv_area > 0) & (triangles.area > 0)
+    td[valid] = resolutions[valid] * np.sqrt(triangles.uv_area[valid] / triangles.area[valid]) / scale_length
+    return td
+
+def vertical_mask(triangles):
+    '''Triangles of polygons with normal at 90 degrees to up vector'''
+    angles = np.degrees(np.arccos(np.clip(triangles.normal_z, -1.0, 1.0)))
+    return np.round(angles) == 90
+
+def evaluate_triangles(triangles, udim_resolutions, use_udims=True, skip_vertical=False, skip_small=True):
+    '''Shared texel density kernel.
+    Returns UDIM numbers, mask of evaluated triangles, mask of triangles out of UDIM tiles,
+    texel density and set of used UDIM numbers for every triangle'''
+    if use_udims:
+        udims, udims_used = triangles_udims(triangles)
+        out_udim = (udims == 0) | ~np.isin(udims, list(udim_resolutions.keys()))
+    else:
+        udims = np.full(len(triangles), 1001, dtype=np.int64)
+        udims_used = set()
+        out_udim = np.zeros(len(triangles), dtype=bool)
+    evaluated = ~out_udim
+    if skip_vertical:
+        evaluated &= ~vertical_mask(triangles)
+
+    resolutions = resolutions_by_udims(udims, udim_resolutions)
+    if skip_small:
+        evaluated &= resolutions > 256
+    else:
+        evaluated &= resolutions > 0
+
+    scale_length = bpy.context.scene.unit_settings.scale_length
+    td = calculate_texel_density(triangles, resolutions, scale_length)
+    return udims, evaluated, out_udim, td, udims_used
+
+def _fingerprint(polygons_count, co, vertex_indices, uv):
+    crc = zlib.crc32(vertex_indices.tobytes(), zlib.crc32(co.tobytes()))
+    return (polygons_count, zlib.crc32(uv.tobytes(), crc))
+
+def _mesh_fingerprint(obj):
+    '''Fingerprint of current mesh data, read only to revalidate cache entry after depsgraph update'''
+    me = obj.data
+    uv_layer = me.uv_layers.active
+    if uv_layer is None:
+        return None
+    co = np.empty(len(me.vertices) * 3, dtype=np.float64)
+    me.vertices.foreach_get("co", co)
+    vertex_indices = np.empty(len(me.loops), dtype=np.int32)
+    me.loops.foreach_get("vertex_index", vertex_indices)
+    uv = np.empty(len(me.loops) * 2, dtype=np.float64)
+    uv_layer.data.foreach_get("uv", uv)
+    return _fingerprint(len(me.polygons), co, vertex_indices, uv)
+
+def _get_cache_entry(obj):
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+    me = obj.data
+    key = (me.as_pointer(), tuple(obj.scale))
+    entry = _cache.get(key)
+    if entry is not None and (entry.mesh_uid != me.session_uid or entry.mesh_name != me.name):
+        entry = None
+    if entry is not None and entry.dirty:
+        if entry.triangles is None or entry.triangles.fingerprint != _mesh_fingerprint(obj):
+            entry = None
+        else:
+            entry.dirty = False
+    if entry is None:
+        entry = _CacheEntry(me, read_mesh_triangles(obj))
+        _cache[key] = entry
+    _cache.move_to_end(key)
+    while len(_cache) > MAX_CACHED_MESHES:
+        _cache.popitem(last=False)
+    return entry
+
+def get_mesh_triangles(obj):
+    '''Cached read_mesh_triangles, recalculated only after mesh was changed'''
+    return _get_cache_entry(obj).triangles
+
+def get_polygons_errors(obj, udim_resolutions, td_min, td_max, use_udims=True, skip_vertical=False, skip_small=True):
+    '''Polygon indices with texel density less and greater than bounds and polygon indices out of UDIM tiles.
+    Results are cached by mesh, textures and bounds'''
+    entry = _get_cache_entry(obj)
+    triangles = entry.triangles
+    scale_length = bpy.context.scene.unit_settings.scale_length
+    key = (tuple(sorted(udim_resolutions.items())), td_min, td_max, use_udims, skip_vertical, skip_small, scale_length)
+    if key in entry.results:
+        return entry.results[key]
+
+    if triangles is None:
+        result = ([], [], [])
+    else:
+        udims, evaluated, out_udim, td, udims_used = evaluate_triangles(triangles, udim_resolutions, use_udims, skip_vertical, skip_small)
+        result = (np.unique(triangles.poly_indices[evaluated & (td < td_min)]).tolist(),
+                  np.unique(triangles.poly_indices[evaluated & (td > td_max)]).tolist(),
+                  np.unique(triangles.poly_indices[out_udim]).tolist())
+    entry.results[key] = result
+    return result
+
+def clear_cache():
+    _cache.clear()
+
+@bpy.app.handlers.persistent
+def depsgraph_update_handler(scene, depsgraph):
+    if not _cache:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Object):
+            if id_data.type != 'MESH':
+                continue
+            id_data = id_data.data
+        if isinstance(id_data, bpy.types.Mesh):
+            mesh_pointer = id_data.as_pointer()
+            for (pointer, scale), entry in _cache.items():
+                if pointer == mesh_pointer:
+                    entry.dirty = True
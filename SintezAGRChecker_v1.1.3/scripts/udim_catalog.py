@@ -0,0 +1,99 @@
+import os
+import re
+
+from . import image_utils
+
+
+DIFFUSE = 0
+ERM = 1
+NORMAL = 2
+
+# T_<address>_<kind>_<n>.<tile>.png
+TEXTURE_NAME_RE = re.compile(r"^T_(?P<address>.+?)_(?P<kind>[A-Za-z ]+)_(?P<number>\d+)\.(?P<tile>\d{4})\.png$", re.IGNORECASE)
+KINDS_BY_NAME = {"diffuse": DIFFUSE, "basecolor": DIFFUSE, "erm": ERM, "normal": NORMAL}
+
+# folder -> (folder mtime, UdimCatalog)
+_catalogs = dict()
+
+
+def parse_texture_name(name):
+    '''Texture kind (None if unknown) and UDIM tile number (0 if not found)'''
+    match = TEXTURE_NAME_RE.match(name)
+    if match:
+        kind = KINDS_BY_NAME.get(match.group("kind").lower().replace(" ", ""))
+        if kind is not None:
+            return kind, int(match.group("tile"))
+
+    name_lower = name.lower()
+    if "diffuse" in name_lower or "basecolor" in name_lower.replace(" ", ""):
+        kind = DIFFUSE
+    elif "ERM" in name or "_erm_" in name_lower:
+        kind = ERM
+    elif "normal" in name_lower:
+        kind = NORMAL
+    else:
+        kind = None
+    parts = name.split(".")
+    tile = int(parts[1]) if len(parts) > 2 and parts[1].isdigit() else 0
+    return kind, tile
+
+class UdimCatalog():
+    '''Textures of one folder by UDIM tiles, built from one directory scan'''
+    def __init__(self, root):
+        self.root = root
+        self.png_files = []
+        self.tiles = dict()
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_file() and ".png" in entry.name.lower():
+                    self.png_files.append(entry.name)
+        self.png_files.sort()
+        for name in self.png_files:
+            self.tiles[name] = parse_texture_name(name)
+
+        tile_numbers = [tile for _, tile in self.tiles.values() if tile > 1000]
+        self.sets_count = max(tile_numbers) - 1000 if tile_numbers else 0
+        self.diffuse = [None for _ in range(self.sets_count)]
+        self.erm = [None for _ in range(self.sets_count)]
+        self.normal = [None for _ in range(self.sets_count)]
+        sets = (self.diffuse, self.erm, self.normal)
+        for name, (kind, tile) in self.tiles.items():
+            if kind is None or tile <= 1000:
+                continue
+            sets[kind][tile - 1000 - 1] = name
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    @property
+    def resolutions(self):
+        '''Max texture size of every tile, 0 if tile has no readable textures.
+        Sizes come from image info index, so changed files are read again'''
+        resolutions = []
+        for names in zip(self.diffuse, self.erm, self.normal):
+            max_res = 0
+            for name in names:
+                if name is None:
+                    continue
+                size = image_utils.image_index.get_size(self.path(name))
+                if size and size[0] > max_res:
+                    max_res = size[0]
+            resolutions.append(max_res)
+        return resolutions
+
+    @property
+    def resolutions_by_number(self):
+        return {1001 + i: res for i, res in enumerate(self.resolutions) if res}
+
+def get_catalog(root):
+    '''Memoized catalog of folder, rebuilt when folder content is changed'''
+    root = os.path.normpath(root)
+    mtime = os.stat(root).st_mtime_ns
+    entry = _catalogs.get(root)
+    if entry is None or entry[0] != mtime:
+        entry = (mtime, UdimCatalog(root))
+        _catalogs[root] = entry
+    return entry[1]
+
+def clear_cache():
+    _catalogs.clear()
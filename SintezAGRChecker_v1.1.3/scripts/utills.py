@@ -1,7 +1,5 @@
 
 import os
-import struct
-import imghdr
 import math
 import csv
 import traceback
@@ -19,6 +17,11 @@ from . import utills
 from . import ui_utills
 from . import os_utils
 from . import logger
+from . import texel_density
+from . import image_utils
+from . import udim_catalog
+from . import zip_preflight
+from . import worker_farm
 
 
 CHECK_STATE_ITEMS = [
@@ -43,218 +46,33 @@ class UdimSet():
         return result
 
 def create_udim_sets(root):
+    catalog = udim_catalog.get_catalog(root)
     udim_set = UdimSet()
-    files = [f for f in os.listdir(root) if ".png" in f]
-    if not files:
-        return udim_set
-
-    count = max([udim_number(f) for f in files]) - 1000
-    udim_set.sets_count = count
-    udim_set.diffuse_set = [None for _ in range(count)]
-    udim_set.erm_set = [None for _ in range(count)]
-    udim_set.normal_set = [None for _ in range(count)]
-
-    for file in files:
-        ind = udim_number(file) - 1000 - 1
-        if "diffuse" in file.lower() or "basecolor" in file.lower().replace(" ", ""):
-            # udim_set.diffuse_set.append(file)
-            udim_set.diffuse_set[ind] = file
-        elif "_erm_" in file.lower():
-            udim_set.erm_set[ind] = file
-        elif "normal" in file.lower():
-            udim_set.normal_set[ind] = file
-
-    for set in udim_set.collection:
-        max_res = 0
-        for file in set:
-            if file == None:
-                continue
-            num = udim_number(file)
-            res = get_image_size(root + "\\" + file)[0]
-            if res > max_res:
-                max_res = res
-        if max_res != 0:
-            udim_set.resolutions_by_number[num] = max_res
+    udim_set.sets_count = catalog.sets_count
+    udim_set.diffuse_set = list(catalog.diffuse)
+    udim_set.erm_set = list(catalog.erm)
+    udim_set.normal_set = list(catalog.normal)
+    udim_set.resolutions_by_number = catalog.resolutions_by_number
     return udim_set
 
 def udim_number(name):
     return int(name[-8:-4])
 
 def get_image_size(fname):
-    '''Determine the image type of fhandle and return its size.
-    from draco'''
-    with open(fname, 'rb') as fhandle:
-        head = fhandle.read(24)
-        if len(head) != 24:
-            return
-        if imghdr.what(fname) == 'png':
-            check = struct.unpack('>i', head[4:8])[0]
-            if check != 0x0d0a1a0a:
-                return
-            width, height = struct.unpack('>ii', head[16:24])
-        else:
-            return
-        return width, height
+    '''Size of png image, None if file is not png'''
+    return image_utils.image_index.get_size(fname)
 
 def uv_to_udim_number(x, y):
     return 1000 + math.floor(y) * 10 + math.ceil(x)
 
 def _td_errors_by_udim(obj, udim_resolutions, highpoly, td_min, td_max):
     # udim_resolutions = {1001: 4096, 1002: 256, 1003: 2048}
-
-    out_udim_face_indices = []
-    # td_errors_less = dict()
-    # td_errors_greater = dict()
-    # not_uvmap_errors = []
-    # calculated_obj_td_list = []
-
-    td_less_indices = []
-    td_greater_indices = []
-
-    bpy.ops.object.mode_set(mode='OBJECT')
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.mode_set(mode='EDIT')
-    bm = bmesh.from_edit_mesh(obj.data)
-    bmesh.ops.triangulate(bm, faces=bm.faces[:])
-    bm.faces.ensure_lookup_table()
-
-    face_count = len(obj.data.polygons)
-    udims_used = set()
-
-    vector_up = mathutils.Vector((0, 0, 1.0))
-
-    # test_counter = 0
-    for x in range(0, face_count):
-        # bpy.context.scene.agr_scene_properties.progress = x / face_count
-        if not highpoly and round(math.degrees(obj.data.polygons[x].normal.angle(vector_up))) == 90:
-            continue
-        area = 0
-        loops = []
-        try:
-            for loop in bm.faces[x].loops:
-                loops.append(loop[bm.loops.layers.uv.active].uv)
-        except:
-            logger.add("cant find BMLayerItem in bm.loops.layers.uv.active")
-            # not_uvmap_errors.append(f"cant find BMLayerItem in bm.loops.layers.uv.active={bm.loops.layers.uv.active}, obj={obj.name}")
-            continue
-        loops_count = len(loops)
-        a = loops_count - 1
-
-        if highpoly:
-            udim_nums = [uv_to_udim_number(loops[i].x, loops[i].y) for i in range(loops_count)]
-            [udims_used.add(num) for num in udim_nums]
-            # check if all points fall into one tile and tile exist in udims
-            if not all(num == udim_nums[0] for num in udim_nums) or udim_nums[0] not in udim_resolutions.keys():
-                out_udim_face_indices.append(x)
-                continue
-            udim_num = udim_nums[0]
-        else:
-            udim_num = 1001
-
-        largest_side = udim_resolutions[udim_num]
-        if largest_side == None:
-            continue
-        if largest_side <= 256:
-            continue
-        
-        for b in range(0, loops_count):
-            area += (loops[a].x + loops[b].x) * (loops[a].y - loops[b].y)
-            a = b
-        
-        area = abs(0.5 * area)
-        gm_area = obj.data.polygons[x].area
-
-        if gm_area > 0 and area > 0:
-            aspect_ratio = 1
-            texel_density = ((largest_side / math.sqrt(aspect_ratio)) * math.sqrt(area))/(math.sqrt(gm_area)*100) / bpy.context.scene.unit_settings.scale_length
-        else:
-            texel_density = 0.0001
-
-        texel_density = texel_density * 100
-        # test_counter += 1
-        # if test_counter % 100 == 0 and test_counter < 3000:
-        #     logger.add(f"td={texel_density}")
-
-        if highpoly:
-            # texel_min, texel_max = 512, 1706
-            texel_min, texel_max = td_min, td_max
-        else:
-            texel_min, texel_max = td_min, td_max
-        if texel_density < texel_min:
-            td_less_indices.append(x)
-            # if udim_num not in td_errors_less.keys():
-            #     td_errors_less[udim_num] = [largest_side, [], []]
-            # td_errors_less[udim_num][1].append(round(texel_density, 2))
-            # td_errors_less[udim_num][2].append(round(gm_area, 2))
-        elif texel_density > texel_max:
-            td_greater_indices.append(x)
-            # if udim_num not in td_errors_greater.keys():
-            #     td_errors_greater[udim_num] = [largest_side, [], []]
-            # td_errors_greater[udim_num][1].append(round(texel_density, 2))
-            # td_errors_greater[udim_num][2].append(round(gm_area, 2))
-
-        # calculated_obj_td_list.append(texel_density)
-
-    # udim_used_errors = []
-    # for key in udim_resolutions.keys():
-    #     if key not in udims_used:
-    #         udim_used_errors.append(f"Неиспользуемая текстура, UDIM {key}")
-
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    return td_less_indices, td_greater_indices, out_udim_face_indices
+    if highpoly:
+        return texel_density.get_polygons_errors(obj, udim_resolutions, td_min, td_max)
+    return texel_density.get_polygons_errors(obj, {1001: udim_resolutions[1001]}, td_min, td_max, use_udims=False, skip_vertical=True)
 
 def _td_errors(obj, tex_size, td_min, td_max):
-    td_less_indices = []
-    td_greater_indices = []
-
-    bpy.ops.object.mode_set(mode='OBJECT')
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True, properties=False)
-    bpy.ops.object.mode_set(mode='EDIT')
-    bm = bmesh.from_edit_mesh(obj.data)
-    bmesh.ops.triangulate(bm, faces=bm.faces[:])
-    bm.faces.ensure_lookup_table()
-
-    face_count = len(obj.data.polygons)
-
-    for x in range(0, face_count):
-        area = 0
-        loops = []
-        try:
-            for loop in bm.faces[x].loops:
-                loops.append(loop[bm.loops.layers.uv.active].uv)
-        except:
-            logger.add("cant find BMLayerItem in bm.loops.layers.uv.active")
-            # not_uvmap_errors.append(f"cant find BMLayerItem in bm.loops.layers.uv.active={bm.loops.layers.uv.active}, obj={obj.name}")
-            continue
-        loops_count = len(loops)
-        a = loops_count - 1
-        largest_side = tex_size
-        
-        for b in range(0, loops_count):
-            area += (loops[a].x + loops[b].x) * (loops[a].y - loops[b].y)
-            a = b
-        
-        area = abs(0.5 * area)
-        gm_area = obj.data.polygons[x].area
-
-        if gm_area > 0 and area > 0:
-            aspect_ratio = 1
-            texel_density = ((largest_side / math.sqrt(aspect_ratio)) * math.sqrt(area))/(math.sqrt(gm_area)*100) / bpy.context.scene.unit_settings.scale_length
-        else:
-            texel_density = 0.0001
-
-        texel_density = texel_density * 100
-
-        texel_min, texel_max = td_min, td_max
-        if texel_density < texel_min:
-            td_less_indices.append(x)
-        elif texel_density > texel_max:
-            td_greater_indices.append(x)
-
-    bpy.ops.object.mode_set(mode='OBJECT')
-
+    td_less_indices, td_greater_indices, _ = texel_density.get_polygons_errors(obj, {1001: tex_size}, td_min, td_max, use_udims=False, skip_small=False)
     return td_less_indices, td_greater_indices
 
 def ensure_import_openpyxl():
@@ -365,8 +183,47 @@ def get_requirements_data(highpoly=False):
 
 def calculate_all_checks(context, bl_operator, by_collections):
     models_path = bpy.path.abspath(context.scene.agr_scene_properties.path)
-    lp_checks, hp_checks, project_data = check_highpoly_lowpoly.run(bl_operator, context.scene.agr_scene_properties.Address, models_path, by_collections)
+    scene_properties = context.scene.agr_scene_properties
+    if scene_properties.worker_processes > 0 and not by_collections:
+        lp_checks, hp_checks, project_data = worker_farm.run(models_path, scene_properties.Address, scene_properties.worker_processes, scene_properties.use_results_cache)
+    else:
+        lp_checks, hp_checks, project_data = check_highpoly_lowpoly.run(bl_operator, scene_properties.Address, models_path, by_collections, scene_properties.use_results_cache, scene_properties.streaming_checks)
     context.scene.agr_scene_properties.project_data_address = project_data.address
+    apply_checks(context, lp_checks, hp_checks)
+
+def iter_calculate_all_checks(bl_operator, progress, by_collections=False):
+    '''Steps of calculate_all_checks for modal operator. Checklist is filled after the last step only.
+    bpy.context is used because context of operator invoke is not valid between modal steps'''
+    models_path = bpy.path.abspath(bpy.context.scene.agr_scene_properties.path)
+    scene_properties = bpy.context.scene.agr_scene_properties
+    if scene_properties.worker_processes > 0 and not by_collections:
+        yield from worker_farm.iter_run(progress, models_path, scene_properties.Address, scene_properties.worker_processes, scene_properties.use_results_cache)
+    else:
+        yield from check_highpoly_lowpoly.iter_run(progress, bl_operator, scene_properties.Address, models_path, by_collections, scene_properties.use_results_cache, scene_properties.streaming_checks, deferred_import=True)
+    lp_checks, hp_checks, project_data = progress.result
+    bpy.context.scene.agr_scene_properties.project_data_address = project_data.address
+    apply_checks(bpy.context, lp_checks, hp_checks)
+
+def update_check_run(window_manager, progress=None):
+    '''Show progress of running checks in main panel, progress None - checks are finished'''
+    check_run = window_manager.agr_check_run
+    check_run.running = progress is not None
+    check_run.progress = progress.factor if progress else 0.0
+    check_run.progress_text = progress.text if progress else ""
+    check_run.stage_timings = progress.timings_text if progress else ""
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+def calculate_preflight_checks(context):
+    '''Checks of archives without extraction and import. Only requirements covered by preflight are updated'''
+    models_path = bpy.path.abspath(context.scene.agr_scene_properties.path)
+    lp_checks, hp_checks = zip_preflight.run(models_path)
+    apply_checks(context, lp_checks, hp_checks, update_auto=False)
+
+def apply_checks(context, lp_checks, hp_checks, update_auto=True):
+    '''Fill checklist items by checks grouped by requirement ids'''
     if lp_checks:
         context.scene.agr_scene_properties.has_lowpoly = True
     if hp_checks:
@@ -387,7 +244,7 @@ def calculate_all_checks(context, bl_operator, by_collections):
         for cat in categories:
             for item in cat.collection:
                 # item.check_state = utills.CHECK_STATE_ITEMS[0]
-                if item.auto and item.req_num not in checks:
+                if update_auto and item.auto and item.req_num not in checks:
                     item.auto = False
                 elif item.req_num in checks:
                     item.auto = True
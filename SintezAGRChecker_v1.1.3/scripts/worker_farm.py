@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+import bpy
+
+from . import logger
+from . import check_highpoly_lowpoly
+from . import project_index
+from . import result_cache
+from . import check_progress
+
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+DEFAULT_WORKERS = max(1, min(8, (os.cpu_count() or 2) // 2))
+POLL_INTERVAL = 0.2
+WORKER_TIMEOUT = 3600
+
+
+class WorkerTask():
+    '''One fbx checked by background Blender process'''
+    def __init__(self, fbx, lowpoly, address, oks_count):
+        self.fbx = fbx
+        self.lowpoly = lowpoly
+        self.address = address
+        self.oks_count = oks_count
+        self.process = None
+        self.start_time = 0
+        self.result_path = ""
+        self.log_path = ""
+        # None if worker failed or its checks were interrupted by errors, fbx is checked in coordinator process then
+        self.checks = None
+
+    @property
+    def fbx_path(self):
+        return os.path.join(self.fbx.root, self.fbx.file_name)
+
+    def start(self, temp_dir, index):
+        self.result_path = os.path.join(temp_dir, f"{index}.json")
+        self.log_path = os.path.join(temp_dir, f"{index}.log")
+        command = [bpy.app.binary_path, "--background", "--factory-startup", "--python", CLI_PATH, "--",
+                   "--worker", self.fbx_path, "--kind", "lp" if self.lowpoly else "hp",
+                   "--address", self.address, "--oks-count", str(self.oks_count), "--result", self.result_path]
+        with open(self.log_path, 'w') as log_file:
+            self.process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+        self.start_time = time.time()
+
+    def finish(self):
+        try:
+            with open(self.result_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data["complete"]:
+                self.checks = [check_highpoly_lowpoly.Check.from_dict(check) for check in data["checks"]]
+        except (OSError, ValueError, KeyError):
+            self.checks = None
+        if self.checks is None or self.process.returncode != 0:
+            self.checks = None
+            logger.add(f"Фоновый процесс не проверил {self.fbx.file_name} (код {self.process.returncode}), fbx будет проверен в основном процессе")
+            try:
+                with open(self.log_path, 'r', errors='replace') as f:
+                    logger.add(f.read()[-2000:])
+            except OSError:
+                pass
+
+def iter_workers(tasks, max_workers=DEFAULT_WORKERS):
+    '''Check fbx files of tasks in parallel background Blender processes, largest files are started first.
+    Yields each finished task, or None if no worker has finished since previous step. Closing generator kills workers'''
+    if not tasks:
+        return
+    temp_dir = tempfile.mkdtemp(prefix="agr_workers_")
+    pending = sorted(tasks, key=lambda task: os.path.getsize(task.fbx_path), reverse=True)
+    running = []
+    try:
+        index = 0
+        while pending or running:
+            while pending and len(running) < max_workers:
+                task = pending.pop(0)
+                task.start(temp_dir, index)
+                index += 1
+                running.append(task)
+            finished = False
+            for task in list(running):
+                if task.process.poll() is None:
+                    if time.time() - task.start_time < WORKER_TIMEOUT:
+                        continue
+                    task.process.kill()
+                    task.process.wait()
+                running.remove(task)
+                task.finish()
+                logger.add(f"checked in worker: {task.fbx.file_name}, {round(time.time() - task.start_time, 2)} сек.")
+                finished = True
+                yield task
+            if not finished:
+                yield None
+    finally:
+        for task in running:
+            task.process.kill()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def run_workers(tasks, max_workers=DEFAULT_WORKERS):
+    for task in iter_workers(tasks, max_workers):
+        if task is None:
+            time.sleep(POLL_INTERVAL)
+
+def run(root_path, address, max_workers=DEFAULT_WORKERS, use_cache=False):
+    '''Same results as check_highpoly_lowpoly.run, but every fbx is imported and checked by its own background Blender process.
+    Project-level checks are made over merged results, models are not left in scene'''
+    progress = check_progress.CheckProgress()
+    for step in iter_run(progress, root_path, address, max_workers, use_cache):
+        if step is None:
+            time.sleep(POLL_INTERVAL)
+    return progress.result
+
+def iter_run(progress, root_path, address, max_workers=DEFAULT_WORKERS, use_cache=False):
+    '''Steps of run for modal operator. Yields progress after each stage and each finished fbx,
+    None while workers are running. Closing generator kills workers. Result is set to progress.result'''
+    check_highpoly_lowpoly.start_time = time.time()
+    project_data = check_highpoly_lowpoly.ProjectData()
+    lp_result, hp_result = None, None
+    progress.result = (lp_result, hp_result, project_data)
+    if not root_path:
+        return
+
+    preparer = check_highpoly_lowpoly.ModelPreparer()
+    preparer.root_path = root_path
+    preparer.address = address
+    preparer.project_index = project_index.ProjectIndex(root_path)
+    if use_cache:
+        preparer.results_cache = result_cache.ResultCache(root_path)
+    # fbx files which workers could not check are imported one by one
+    preparer.streaming = True
+
+    progress.start_stage("Распаковка архивов")
+    has_lp, has_hp = preparer.check_if_has_lp_hp()
+    preparer.unzip()
+    preparer.clear_images()
+    yield progress
+
+    lowpoly_checks = check_highpoly_lowpoly.LowpolyChecks()
+    lowpoly_checks.address = address
+    lowpoly_checks.root_path = root_path
+    lowpoly_checks.project_index = preparer.project_index
+    highpoly_checks = check_highpoly_lowpoly.HighpolyChecks()
+    highpoly_checks.address = address
+    highpoly_checks.root_path = root_path
+    highpoly_checks.project_index = preparer.project_index
+
+    tasks = []
+    if has_lp:
+        preparer.import_lowpoly_models()
+        lowpoly_checks.detect_address(preparer.lp_fbx_files)
+        tasks.extend(WorkerTask(fbx, True, lowpoly_checks.address, 0) for fbx in preparer.lp_fbx_files if fbx.cached_checks is None)
+    if has_hp:
+        preparer.import_highpoly_models()
+        highpoly_checks.detect_address(preparer.hp_fbx_files)
+        tasks.extend(WorkerTask(fbx, False, highpoly_checks.address, preparer.oks_count) for fbx in preparer.hp_fbx_files if fbx.cached_checks is None)
+
+    progress.start_stage("Проверка в фоновых процессах")
+    progress.set_total("workers", sum(check_progress.fbx_work(task.fbx) for task in tasks))
+    workers = iter_workers(tasks, max_workers)
+    try:
+        step_start = time.time()
+        for task in workers:
+            if task is None:
+                yield None
+                continue
+            progress.advance(check_progress.fbx_work(task.fbx), time.time() - step_start, task.fbx.file_name)
+            step_start = time.time()
+            yield progress
+    finally:
+        workers.close()
+    for task in tasks:
+        if task.checks is None:
+            continue
+        task.fbx.cached_checks = task.checks
+        task.fbx.checks = task.checks
+
+    if has_lp:
+        progress.start_stage("Проверка НПМ")
+        progress.set_total("lp", sum(check_progress.fbx_work(fbx) for fbx in preparer.lp_fbx_files if fbx.cached_checks is None))
+        yield from check_highpoly_lowpoly.track_fbx_steps(progress, lowpoly_checks.iter_checks(preparer.lp_fbx_files, preparer))
+        preparer.save_results_cache(preparer.lp_fbx_files)
+        lp_result = lowpoly_checks.lp_checks_by_ids
+        project_data.address = lowpoly_checks.address
+        logger.add(lowpoly_checks.lp_result_report)
+
+    if has_hp:
+        progress.start_stage("Проверка ВПМ")
+        progress.set_total("hp", sum(check_progress.fbx_work(fbx) for fbx in preparer.hp_fbx_files if fbx.cached_checks is None))
+        yield from check_highpoly_lowpoly.track_fbx_steps(progress, highpoly_checks.iter_meshes_check(preparer.hp_fbx_files, preparer.oks_count, None, preparer))
+        preparer.save_results_cache(preparer.hp_fbx_files)
+        highpoly_checks.add_checks(preparer.prepare_checks)
+        highpoly_checks.generate_result()
+        hp_result = highpoly_checks.hp_checks_by_ids
+        project_data.address = highpoly_checks.address
+        logger.add(highpoly_checks.hp_result_report)
+
+    progress.end_stage()
+    progress.result = (lp_result, hp_result, project_data)
+
+def run_worker(fbx_path, lowpoly, address, oks_count, result_path):
+    '''Worker process: import and check one fbx, write its checks to result_path. Returns process exit code'''
+    check_highpoly_lowpoly.start_time = time.time()
+    errors_count = check_highpoly_lowpoly.handled_errors_count
+    root, file = os.path.split(fbx_path)
+    check_highpoly_lowpoly.clear_blender_file()
+
+    preparer = check_highpoly_lowpoly.ModelPreparer()
+    preparer.root_path = root
+    fbx = check_highpoly_lowpoly.FbxFile(file, root)
+    fbx.zip_name = os.path.basename(root) + ".zip"
+    fbx.read_inventory()
+    if not lowpoly:
+        for name in os.listdir(root):
+            if name.endswith(".geojson"):
+                fbx.json_name = name
+        if fbx.json_name:
+            fbx.json_data = check_highpoly_lowpoly.ModelPreparer._get_json_data(os.path.join(root, fbx.json_name))
+
+    if not preparer.load_fbx(fbx):
+        return 1
+    if lowpoly:
+        lowpoly_checks = check_highpoly_lowpoly.LowpolyChecks()
+        lowpoly_checks.address = address
+        checks = lowpoly_checks.run_fbx_check(fbx)
+    else:
+        highpoly_checks = check_highpoly_lowpoly.HighpolyChecks()
+        highpoly_checks.address = address
+        checks = highpoly_checks.run_fbx_check(fbx, oks_count)
+
+    complete = fbx.checks is not None and check_highpoly_lowpoly.handled_errors_count == errors_count
+    tmp_path = result_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"complete": complete, "checks": [check.to_dict() for check in checks]}, f, ensure_ascii=False)
+    os.replace(tmp_path, result_path)
+    return 0
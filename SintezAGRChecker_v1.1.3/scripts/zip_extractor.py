@@ -0,0 +1,130 @@
+import os
+import json
+import ntpath
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from . import logger
+from . import os_utils
+
+
+MANIFEST_NAME = "extraction_manifest.json"
+EXTRACT_WORKERS = 8
+
+
+def get_manifest_path(root):
+    return os.path.join(root, os_utils.CHECKLIST_DATA_FOLDER_NAME, MANIFEST_NAME)
+
+def load_manifest(root):
+    try:
+        with open(get_manifest_path(root), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+def save_manifest(root, manifest):
+    path = get_manifest_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def _member_target(dest, filename):
+    '''Path of extracted member inside dest, None for unsafe names. Name is cleaned as zipfile does:
+    drive, leading separators, "." and ".." parts are dropped (windows drives are checked on any os, archives are made on windows)'''
+    name = ntpath.splitdrive(filename.replace("\\", "/"))[1]
+    parts = [p for p in name.split("/") if p not in ("", ".", "..") and not ntpath.splitdrive(p)[0] and ":" not in p]
+    if not parts:
+        return None
+    target = os.path.join(dest, *parts)
+    real_dest = os.path.realpath(dest)
+    try:
+        if os.path.commonpath([real_dest, os.path.realpath(target)]) != real_dest:
+            return None
+    except ValueError:
+        return None
+    return target
+
+def _extract_member(zip_ref, info, target):
+    with zip_ref.open(info) as src, open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+def _plan_archive(root, zip_name, entry):
+    '''Archive manifest entry, list of (ZipInfo, target path) to extract and paths of members removed from archive.
+    Empty lists if archive was not changed'''
+    zip_path = os.path.join(root, zip_name)
+    dest = os.path.join(root, zip_name[:-4]).rstrip()
+    stat = os.stat(zip_path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns and os.path.isdir(dest):
+        return entry, dest, [], []
+
+    old_members = entry["members"] if entry else dict()
+    members = dict()
+    to_extract = []
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            target = _member_target(dest, info.filename)
+            if target is None:
+                continue
+            members[info.filename] = info.CRC
+            if old_members.get(info.filename) != info.CRC or not os.path.isfile(target) or os.path.getsize(target) != info.file_size:
+                to_extract.append((info, target))
+
+    stale = []
+    for filename in old_members:
+        if filename not in members:
+            target = _member_target(dest, filename)
+            if target:
+                stale.append(target)
+
+    new_entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "members": members}
+    return new_entry, dest, to_extract, stale
+
+def extract_archives(root, zip_names, max_workers=EXTRACT_WORKERS):
+    '''Extract only new or changed members of archives (by manifest of size, mtime and member CRC) in parallel threads.
+    Returns True if any archive was changed since previous extraction'''
+    manifest = load_manifest(root)
+    plans = []
+    stale = []
+    changed = False
+    for zip_name in zip_names:
+        entry = manifest.get(zip_name)
+        new_entry, dest, to_extract, stale_members = _plan_archive(root, zip_name, entry)
+        stale.extend(stale_members)
+        changed = changed or new_entry is not entry
+        manifest[zip_name] = new_entry
+        if to_extract:
+            logger.add(f"Извлечение архива {zip_name} ({len(to_extract)} файлов)")
+            plans.append((zip_name, to_extract))
+
+    zip_refs = []
+    try:
+        tasks = []
+        for zip_name, to_extract in plans:
+            zip_ref = zipfile.ZipFile(os.path.join(root, zip_name), 'r')
+            zip_refs.append(zip_ref)
+            for info, target in to_extract:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tasks.append((zip_ref, info, target))
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+                for future in [executor.submit(_extract_member, *task) for task in tasks]:
+                    future.result()
+    finally:
+        for zip_ref in zip_refs:
+            zip_ref.close()
+
+    # members removed from archives are deleted only after all members were extracted, manifest is written last
+    for target in stale:
+        if os.path.isfile(target):
+            os.remove(target)
+
+    for zip_name in list(manifest):
+        if zip_name not in zip_names:
+            del manifest[zip_name]
+    save_manifest(root, manifest)
+    return changed
@@ -0,0 +1,119 @@
+import os
+import re
+import zipfile
+
+from . import image_utils
+from . import udim_catalog
+from . import check_highpoly_lowpoly
+
+
+ALLOWED_RESOLUTIONS = [256, 2048, 4096]
+
+
+def group_by_ids(checks):
+    checks_by_ids = dict()
+    for check in checks:
+        checks_by_ids.setdefault(check.paragraph_ids[0], []).append(check)
+    return checks_by_ids
+
+def _check_name(file, check_chars, check_length):
+    if re.search(r'[^a-zA-Z0-9_.]', file):
+        check_chars.add_error(f"Недопустимые символы: {file}")
+    if len(file) > 254:
+        check_length.add_error(f"Недопустимая длина имени файла: {file}")
+
+def _check_png_member(zip_ref, info, file, check_resolution, check_alpha, check_placeholder_alpha):
+    with zip_ref.open(info) as f:
+        header = image_utils.read_png_header(f)
+    if header is None:
+        check_resolution.add_error(f"Не удалось получить разрешение текстуры {file}")
+        return
+    for res in header.size:
+        if res not in ALLOWED_RESOLUTIONS:
+            check_resolution.add_error(f"Недопустимое разрешение: {file} ({res})")
+    if header.width != header.height:
+        check_resolution.add_error(f"Текстура не квадратная: {file} ({header.width}x{header.height})")
+
+    kind, _ = udim_catalog.parse_texture_name(file)
+    if not header.has_alpha:
+        return
+    if kind == udim_catalog.ERM:
+        check_alpha.add_error(f"{file}: карта ERM с альфа-каналом")
+    elif kind == udim_catalog.NORMAL:
+        check_alpha.add_error(f"{file}: карта Normal с альфа-каналом")
+    elif kind == udim_catalog.DIFFUSE and header.width == image_utils.PLACEHOLDER_SIZE:
+        check_placeholder_alpha.add_error(f"{file}: заглушка с альфа-каналом")
+
+def check_archive(zip_path, check_lp):
+    '''File and naming checks of one archive by its central directory and png headers, nothing is extracted'''
+    archive_name = os.path.basename(zip_path)[:-4]
+    check1 = check_highpoly_lowpoly.Check("Проверка файлов. Формат", archive_name, True, "таблица 2, п.1, п/п 2", "", ["2.1.2"])
+    check3 = check_highpoly_lowpoly.Check("Проверка наименований. Недопустимые символы", archive_name, True, "таблица 2, п. 10, п/п 1-2", "", ["2.10.1"])
+    check4 = check_highpoly_lowpoly.Check("Проверка наименований. Длина", archive_name, True, "таблица 2, п. 10, п/п 1-2", "", ["2.10.2"])
+    checks = [check1, check3, check4]
+    if not check_lp:
+        check5 = check_highpoly_lowpoly.Check("Проверка UDIM. Разрешение текстурных наборов", archive_name, True, "таблица 2, п. 5, п/п 1.2, 1.3, 3.1.1, 3.1.2", "файлов", ["2.5.1.2"])
+        check6 = check_highpoly_lowpoly.Check("Проверка png. ERM, Normal. Альфа-канал", archive_name, True, "таблица 2, п. 5, п/п 1.6", "файлов", ["2.5.1.6"])
+        check7 = check_highpoly_lowpoly.Check("Проверка png. Заглушки. Альфа-канал", archive_name, True, "таблица 2, п. 5, п/п 3.3", "файлов", ["2.5.3.3"])
+        checks.extend([check5, check6, check7])
+
+    try:
+        zip_ref = zipfile.ZipFile(zip_path, 'r')
+    except (zipfile.BadZipFile, OSError):
+        check1.add_error(f"{os.path.basename(zip_path)}: не удалось открыть архив")
+        return checks
+
+    formats = ["fbx", "FBX"] if check_lp else ["fbx", "FBX", "geojson", "GEOJSON", "png", "PNG"]
+    with zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            file = os.path.basename(info.filename)
+            if ".blend" in file:
+                continue
+            if file.split(".")[-1] not in formats:
+                check1.add_error(file)
+            _check_name(file, check3, check4)
+            if not check_lp and file.lower().endswith(".png"):
+                check5.checked_count += 1
+                _check_png_member(zip_ref, info, file, check5, check6, check7)
+    return checks
+
+def run(root_path):
+    '''Checks of all archives in project folder by lowpoly and highpoly, grouped by requirement ids'''
+    lp_checks = []
+    hp_checks = []
+    if not root_path or not os.path.isdir(root_path):
+        return (None, None)
+
+    for check_lp, checks in ((True, lp_checks), (False, hp_checks)):
+        directory = os.path.basename(os.path.normpath(root_path))
+        check1 = check_highpoly_lowpoly.Check("Проверка файлов. Формат", directory, True, "таблица 2, п.1, п/п 2", "", ["2.1.2"])
+        check2 = check_highpoly_lowpoly.Check("Проверка файлов. Размер архивов", directory, True, "таблица 2, п. 1, п/п 1", "", ["2.1.1"])
+        check3 = check_highpoly_lowpoly.Check("Проверка наименований. Недопустимые символы", directory, True, "таблица 2, п. 10, п/п 1-2", "", ["2.10.1"])
+        check4 = check_highpoly_lowpoly.Check("Проверка наименований. Длина", directory, True, "таблица 2, п. 10, п/п 1-2", "", ["2.10.2"])
+        checks.extend([check1, check2, check3, check4])
+
+        with os.scandir(root_path) as entries:
+            files = sorted(entry.name for entry in entries if entry.is_file())
+        for file in files:
+            if ".blend" in file:
+                continue
+            if not file.endswith(".zip"):
+                if not check_lp:
+                    check1.add_error(file)
+                continue
+            if file[:4].isdigit() != check_lp:
+                continue
+            _check_name(file, check3, check4)
+            check2.checked_count += 1
+            file_path = os.path.join(root_path, file)
+            file_size = os.path.getsize(file_path)
+            max_size = 1024 * 1048576 if check_lp else 500 * 1048576
+            if file_size > max_size:
+                check2.add_error(f"{file} ({file_size / 1048576} Mb)")
+            checks.extend(check_archive(file_path, check_lp))
+
+    lp_result = group_by_ids(lp_checks) if lp_checks[1].checked_count else None
+    hp_result = group_by_ids(hp_checks) if hp_checks[1].checked_count else None
+    return (lp_result, hp_result)